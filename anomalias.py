@@ -0,0 +1,116 @@
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import database
+
+JANELA_DIAS = 28        # dias anteriores usados como referência
+MIN_OBSERVACOES = 7     # mínimo de dias com dado na janela para avaliar
+LIMIAR_ESCORE = 3.5     # |z robusto| acima disso vira alerta
+REPROCESSAR_DIAS = 3    # reavalia os últimos dias (lançamentos atrasados)
+BLOCO_DIAS = 60         # dias avaliados por vez (limita a memória das janelas)
+
+_CHAVE_ULTIMA_DATA = "anomalias_ultima_data"
+
+
+def _mediana(janelas: np.ndarray) -> np.ndarray:
+    # Mediana no último eixo ignorando NaN: o sort deixa os NaN no fim e a
+    # contagem de valores válidos indica as posições centrais.
+    ordenado = np.sort(janelas, axis=-1)
+    n = np.sum(~np.isnan(janelas), axis=-1)[..., None]
+    baixo = np.take_along_axis(ordenado, np.maximum((n - 1) // 2, 0), axis=-1)[..., 0]
+    alto = np.take_along_axis(ordenado, n // 2, axis=-1)[..., 0]
+    return (baixo + alto) / 2
+
+
+def _escore_robusto(matriz: np.ndarray, janela: int) -> tuple[np.ndarray, np.ndarray]:
+    """z robusto de cada dia contra mediana/MAD dos `janela` dias anteriores.
+
+    matriz: dias x séries (NaN = sem dado). Devolve (escore, mediana) para as
+    linhas a partir de `janela`; dias sem base suficiente ficam NaN.
+    """
+    janelas = sliding_window_view(matriz, janela, axis=0)[:-1]  # (dias, séries, janela)
+    atual = matriz[janela:]
+    mediana = _mediana(janelas)
+    mad = _mediana(np.abs(janelas - mediana[..., None]))
+    observacoes = np.sum(~np.isnan(janelas), axis=2)
+    valido = (observacoes >= MIN_OBSERVACOES) & (mad > 0) & ~np.isnan(atual)
+    escore = np.full(atual.shape, np.nan)
+    np.divide(0.6745 * (atual - mediana), mad, out=escore, where=valido)
+    return escore, mediana
+
+
+def detectar_anomalias(
+    desde: date | None = None,
+    ate: date | None = None,
+    dias_iniciais: int = 30,
+    motor: str | None = None,
+) -> dict:
+    """Detecta gasto alto e queda de ROAS em todas as séries de clientes ativos.
+
+    Sem `desde`, continua de onde a última execução parou (reavaliando os
+    últimos REPROCESSAR_DIAS) ou, na primeira vez, avalia `dias_iniciais`.
+    Os alertas do período avaliado são substituídos na tabela alertas.
+    """
+    inicio = time.perf_counter()
+    ate = ate or date.today()
+    if desde is None:
+        ultima = database.obter_controle(_CHAVE_ULTIMA_DATA)
+        desde = (
+            date.fromisoformat(ultima) - timedelta(days=REPROCESSAR_DIAS - 1)
+            if ultima else ate - timedelta(days=dias_iniciais - 1)
+        )
+    carga_inicio = desde - timedelta(days=JANELA_DIAS)
+
+    df = database.series_diarias(carga_inicio.isoformat(), ate.isoformat(), motor)
+    resultado = {"series": 0, "dias_avaliados": (ate - desde).days + 1, "alertas": 0}
+    if df.empty:
+        resultado["segundos"] = round(time.perf_counter() - inicio, 3)
+        return resultado
+
+    # Matrizes dias x séries, com o calendário completo (dia sem lançamento = NaN).
+    # A soma é feita em centavos inteiros; a conversão para reais vem depois.
+    calendario = pd.date_range(carga_inicio, ate, freq="D").strftime("%Y-%m-%d")
+    largo = df.pivot_table(
+        index="data", columns=["cliente_id", "produto_id"],
+        values=["investimento_centavos", "faturamento_centavos"], aggfunc="sum",
+    ).reindex(calendario)
+    colunas = largo["investimento_centavos"].columns
+    investimento = largo["investimento_centavos"].to_numpy(dtype=float) / 100
+    faturamento = largo["faturamento_centavos"].reindex(columns=colunas).to_numpy(dtype=float) / 100
+    roas = np.divide(
+        faturamento, investimento,
+        out=np.full(investimento.shape, np.nan), where=investimento > 0,
+    )
+    series = colunas
+    resultado["series"] = len(series)
+
+    # As janelas (dias x séries x JANELA_DIAS) são avaliadas em blocos de
+    # BLOCO_DIAS dias, para a memória não crescer com o período do backfill
+    dias = np.asarray(calendario)
+    alertas = []
+    for metrica, matriz, sinal in (("investimento", investimento, 1), ("roas", roas, -1)):
+        for inicio_bloco in range(JANELA_DIAS, len(dias), BLOCO_DIAS):
+            fim_bloco = min(inicio_bloco + BLOCO_DIAS, len(dias))
+            escore, mediana = _escore_robusto(matriz[inicio_bloco - JANELA_DIAS:fim_bloco], JANELA_DIAS)
+            with np.errstate(invalid="ignore"):
+                linhas, colunas = np.nonzero(sinal * escore > LIMIAR_ESCORE)
+            valores = matriz[inicio_bloco:fim_bloco][linhas, colunas]
+            alertas.extend(zip(
+                series.get_level_values("cliente_id")[colunas].tolist(),
+                series.get_level_values("produto_id")[colunas].tolist(),
+                dias[inicio_bloco + linhas].tolist(),
+                [metrica] * len(linhas),
+                np.round(valores, 2).tolist(),
+                np.round(mediana[linhas, colunas], 2).tolist(),
+                np.round(escore[linhas, colunas], 2).tolist(),
+            ))
+
+    database.substituir_alertas(desde.isoformat(), ate.isoformat(), alertas)
+    database.definir_controle(_CHAVE_ULTIMA_DATA, df["data"].max())
+    resultado["alertas"] = len(alertas)
+    resultado["segundos"] = round(time.perf_counter() - inicio, 3)
+    return resultado
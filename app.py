@@ -1,8 +1,10 @@
 import streamlit as st
 from database import init_db
+from sessao import aplicar_workspace
 
 st.set_page_config(page_title="Traffic Manager", layout="wide")
 
+aplicar_workspace()
 init_db()
 
 # ── CSS Global ────────────────────────────────────
@@ -66,5 +68,6 @@ st.markdown(
     - **Clientes** — cadastrar e gerenciar clientes
     - **Lançamentos** — registrar métricas diárias
     - **Dashboard** — resumo mensal com barra de verba
+    - **Carteira** — projeção de gasto de todos os clientes
     """
 )
@@ -1,20 +1,219 @@
 import sqlite3
 import os
+import queue
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, timedelta
 from pathlib import Path
 
 DB_PATH = Path(__file__).parent / "data" / "traffic.db"
 
+# Motor das consultas analíticas: "sqlite" (padrão) ou "duckdb".
+# Escritas vão sempre para o SQLite.
+MOTOR_ANALITICO = os.environ.get("TRAFFIC_MOTOR_ANALITICO", "sqlite")
 
-def _conn():
-    os.makedirs(DB_PATH.parent, exist_ok=True)
-    conn = sqlite3.connect(str(DB_PATH))
+# Conexões reaproveitadas por arquivo de banco
+POOL_MAX_CONEXOES = 8
+
+# Bancos já inicializados neste processo (evita refazer o schema a cada rerun)
+_inicializados: set[str] = set()
+
+
+# ── Workspaces ────────────────────────────────────
+# Cada agência (workspace) tem seu próprio arquivo em data/workspaces/<nome>.db.
+# Sem workspace, o banco é DB_PATH. O workspace vem de um ContextVar (ferramentas,
+# threads de fundo) ou, se não houver, do resolvedor registrado pela UI (sessão).
+
+_NOME_WORKSPACE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+_workspace: ContextVar[str | None] = ContextVar("workspace", default=None)
+_resolvedor_workspace = None
+
+
+def validar_workspace(nome: str) -> str:
+    if not _NOME_WORKSPACE.match(nome or ""):
+        raise ValueError(f"Nome de workspace inválido: {nome!r}")
+    return nome
+
+
+def diretorio_workspaces() -> Path:
+    return DB_PATH.parent / "workspaces"
+
+
+def usar_workspace(nome: str | None):
+    """Define o workspace do contexto atual (None = banco padrão)."""
+    return _workspace.set(validar_workspace(nome) if nome else None)
+
+
+@contextmanager
+def em_workspace(nome: str | None):
+    token = usar_workspace(nome)
+    try:
+        yield
+    finally:
+        _workspace.reset(token)
+
+
+def definir_resolvedor_workspace(func):
+    """Registra a função que informa o workspace da sessão atual."""
+    global _resolvedor_workspace
+    _resolvedor_workspace = func
+
+
+def workspace_atual() -> str | None:
+    nome = _workspace.get()
+    if nome is None and _resolvedor_workspace is not None:
+        nome = _resolvedor_workspace()
+    return nome
+
+
+def caminho_db(workspace: str | None = None) -> Path:
+    """Arquivo do banco do workspace informado ou do atual."""
+    nome = workspace or workspace_atual()
+    if not nome:
+        return DB_PATH
+    return diretorio_workspaces() / f"{validar_workspace(nome)}.db"
+
+
+def listar_workspaces() -> list[str]:
+    pasta = diretorio_workspaces()
+    if not pasta.exists():
+        return []
+    return sorted(p.stem for p in pasta.glob("*.db") if _NOME_WORKSPACE.match(p.stem))
+
+
+def criar_workspace(nome: str) -> Path:
+    caminho = caminho_db(validar_workspace(nome))
+    if caminho.exists():
+        raise ValueError(f"Workspace já existe: {nome}")
+    with em_workspace(nome):
+        init_db()
+    return caminho
+
+
+def migrar_workspaces(nomes: list[str] | None = None) -> dict[str, float]:
+    """Aplica o schema/migrações em cada workspace; retorna ms por workspace."""
+    tempos = {}
+    for nome in nomes or listar_workspaces():
+        inicio = time.perf_counter()
+        with em_workspace(nome):
+            _inicializados.discard(str(caminho_db()))
+            init_db()
+        tempos[nome] = round((time.perf_counter() - inicio) * 1000, 1)
+    return tempos
+
+
+# ── Conexões ──────────────────────────────────────
+
+# Conexão somente leitura fixa do processo (ver usar_somente_leitura)
+_conexao_leitura: sqlite3.Connection | None = None
+
+_pools: dict[str, queue.LifoQueue] = {}
+_pools_lock = threading.Lock()
+
+
+def usar_somente_leitura(caminho: Path | str | None = None):
+    """Faz _conn() devolver sempre uma única conexão read-only deste processo.
+
+    Usado por workers de lote que só consultam o banco.
+    """
+    global _conexao_leitura
+    caminho = Path(caminho) if caminho is not None else caminho_db()
+    conn = sqlite3.connect(f"{caminho.resolve().as_uri()}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    _conexao_leitura = conn
+
+
+def _nova_conexao(caminho: Path) -> sqlite3.Connection:
+    os.makedirs(caminho.parent, exist_ok=True)
+    # Conexões circulam entre threads pelo pool, mas só uma usa cada vez
+    conn = sqlite3.connect(str(caminho), check_same_thread=False)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
     return conn
 
 
+@contextmanager
+def _conn():
+    """Conexão do pool do workspace atual; commit ao sair, rollback em erro."""
+    if _conexao_leitura is not None:
+        yield _conexao_leitura
+        return
+    caminho = caminho_db()
+    with _pools_lock:
+        pool = _pools.setdefault(str(caminho), queue.LifoQueue(POOL_MAX_CONEXOES))
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _nova_conexao(caminho)
+    try:
+        with conn:
+            yield conn
+    finally:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def _colunas(conn: sqlite3.Connection, tabela: str) -> set[str]:
+    return {r["name"] for r in conn.execute(f"PRAGMA table_info({tabela})")}
+
+
+def _precisa_migrar_centavos(conn: sqlite3.Connection) -> bool:
+    # Decide pelas colunas antigas em reais: enquanto existirem, a migração
+    # não terminou (inclusive se uma tentativa anterior falhou no meio)
+    return any(
+        {"investimento", "faturamento"} & _colunas(conn, tabela)
+        for tabela in ("lancamentos", "metricas_produto")
+    )
+
+
+def _migrar_para_centavos(conn: sqlite3.Connection):
+    # Reais (REAL) -> centavos inteiros; as colunas antigas são removidas.
+    # Tudo numa transação explícita: o sqlite3 do Python não abre transação
+    # antes de DDL, e um ADD COLUMN já confirmado deixaria os valores em zero.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for tabela in ("lancamentos", "metricas_produto"):
+            colunas = _colunas(conn, tabela)
+            atribuicoes = []
+            for coluna in ("investimento", "faturamento"):
+                # Bancos ainda mais antigos não tinham todas as colunas
+                if coluna not in colunas:
+                    conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} REAL NOT NULL DEFAULT 0.0")
+                convertido = f"CAST(ROUND({coluna} * 100) AS INTEGER)"
+                if f"{coluna}_centavos" not in colunas:
+                    conn.execute(
+                        f"ALTER TABLE {tabela} ADD COLUMN {coluna}_centavos INTEGER NOT NULL DEFAULT 0"
+                    )
+                    atribuicoes.append(f"{coluna}_centavos = {convertido}")
+                else:
+                    # Banco meio migrado: linhas gravadas depois da falha já têm
+                    # centavos (e o REAL no padrão 0.0); só as zeradas vêm do REAL
+                    atribuicoes.append(
+                        f"""{coluna}_centavos = CASE WHEN {coluna}_centavos = 0
+                                THEN {convertido} ELSE {coluna}_centavos END"""
+                    )
+            conn.execute(f"UPDATE {tabela} SET {', '.join(atribuicoes)}")
+            conn.execute(f"ALTER TABLE {tabela} DROP COLUMN investimento")
+            conn.execute(f"ALTER TABLE {tabela} DROP COLUMN faturamento")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
 def init_db():
+    caminho = caminho_db()
+    if str(caminho) in _inicializados and caminho.exists():
+        return
     with _conn() as conn:
+        # WAL: leitores (backups, relatórios) não bloqueiam as escritas
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.executescript("""
             CREATE TABLE IF NOT EXISTS clientes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -36,10 +235,10 @@ def init_db():
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 cliente_id INTEGER NOT NULL,
                 data TEXT NOT NULL,
-                investimento REAL NOT NULL DEFAULT 0.0,
+                investimento_centavos INTEGER NOT NULL DEFAULT 0,
                 leads INTEGER NOT NULL DEFAULT 0,
                 vendas INTEGER NOT NULL DEFAULT 0,
-                faturamento REAL NOT NULL DEFAULT 0.0,
+                faturamento_centavos INTEGER NOT NULL DEFAULT 0,
                 observacao TEXT DEFAULT '',
                 criado_em TEXT DEFAULT (datetime('now','localtime')),
                 FOREIGN KEY (cliente_id) REFERENCES clientes(id),
@@ -49,25 +248,264 @@ def init_db():
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 lancamento_id INTEGER NOT NULL,
                 produto_id INTEGER NOT NULL,
-                investimento REAL NOT NULL DEFAULT 0.0,
+                investimento_centavos INTEGER NOT NULL DEFAULT 0,
                 leads INTEGER NOT NULL DEFAULT 0,
                 vendas INTEGER NOT NULL DEFAULT 0,
-                faturamento REAL NOT NULL DEFAULT 0.0,
+                faturamento_centavos INTEGER NOT NULL DEFAULT 0,
                 FOREIGN KEY (lancamento_id) REFERENCES lancamentos(id) ON DELETE CASCADE,
                 FOREIGN KEY (produto_id) REFERENCES produtos(id),
                 UNIQUE(lancamento_id, produto_id)
             );
         """)
-        # Migração: adicionar coluna faturamento se não existir
-        try:
-            conn.execute("ALTER TABLE lancamentos ADD COLUMN faturamento REAL NOT NULL DEFAULT 0.0")
-        except sqlite3.OperationalError:
-            pass
-        # Migração: adicionar coluna investimento em metricas_produto
-        try:
-            conn.execute("ALTER TABLE metricas_produto ADD COLUMN investimento REAL NOT NULL DEFAULT 0.0")
-        except sqlite3.OperationalError:
-            pass
+        # Bancos antigos guardavam dinheiro em reais (REAL)
+        if _precisa_migrar_centavos(conn):
+            _migrar_para_centavos(conn)
+        # Migração: índice FTS5 das observações, mantido por triggers
+        fts_existia = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'lancamentos_fts'"
+        ).fetchone()
+        conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS lancamentos_fts USING fts5(
+                observacao,
+                content='lancamentos',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            );
+            CREATE TRIGGER IF NOT EXISTS lancamentos_fts_ai AFTER INSERT ON lancamentos BEGIN
+                INSERT INTO lancamentos_fts(rowid, observacao) VALUES (new.id, new.observacao);
+            END;
+            CREATE TRIGGER IF NOT EXISTS lancamentos_fts_ad AFTER DELETE ON lancamentos BEGIN
+                INSERT INTO lancamentos_fts(lancamentos_fts, rowid, observacao)
+                VALUES ('delete', old.id, old.observacao);
+            END;
+            CREATE TRIGGER IF NOT EXISTS lancamentos_fts_au AFTER UPDATE OF observacao ON lancamentos BEGIN
+                INSERT INTO lancamentos_fts(lancamentos_fts, rowid, observacao)
+                VALUES ('delete', old.id, old.observacao);
+                INSERT INTO lancamentos_fts(rowid, observacao) VALUES (new.id, new.observacao);
+            END;
+        """)
+        if not fts_existia:
+            conn.execute("INSERT INTO lancamentos_fts(lancamentos_fts) VALUES ('rebuild')")
+        # Alertas de anomalia (produto_id 0 = total do cliente) e estado de jobs
+        conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_lancamentos_data ON lancamentos(data);
+            CREATE TABLE IF NOT EXISTS alertas (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                cliente_id INTEGER NOT NULL,
+                produto_id INTEGER NOT NULL DEFAULT 0,
+                data TEXT NOT NULL,
+                metrica TEXT NOT NULL,
+                valor REAL NOT NULL,
+                referencia REAL NOT NULL,
+                escore REAL NOT NULL,
+                criado_em TEXT DEFAULT (datetime('now','localtime')),
+                FOREIGN KEY (cliente_id) REFERENCES clientes(id),
+                UNIQUE(cliente_id, produto_id, data, metrica)
+            );
+            CREATE TABLE IF NOT EXISTS controle (
+                chave TEXT PRIMARY KEY,
+                valor TEXT
+            );
+            CREATE TABLE IF NOT EXISTS projecoes (
+                cliente_id INTEGER NOT NULL,
+                produto_id INTEGER NOT NULL DEFAULT 0,
+                ano_mes TEXT NOT NULL,
+                gasto REAL NOT NULL,
+                projecao REAL NOT NULL,
+                dias_com_dado INTEGER NOT NULL,
+                ultima_data TEXT,
+                atualizado_em TEXT DEFAULT (datetime('now','localtime')),
+                FOREIGN KEY (cliente_id) REFERENCES clientes(id),
+                PRIMARY KEY (cliente_id, produto_id, ano_mes)
+            );
+        """)
+    _inicializados.add(str(caminho))
+
+
+# ── Motor analítico ───────────────────────────────
+# O DuckDB trabalha sobre um snapshot colunar das tabelas do SQLite,
+# recarregado quando outra conexão altera o arquivo.
+
+_TABELAS_ANALITICAS = ("clientes", "produtos", "lancamentos", "metricas_produto")
+# REAL no DuckDB é float32 e INTEGER é 32 bits; os equivalentes dos tipos
+# do SQLite são DOUBLE e BIGINT
+_TIPOS_DUCKDB = {"REAL": "DOUBLE", "INTEGER": "BIGINT"}
+
+# Intervalo mínimo entre recargas do snapshot: cada recarga copia as tabelas
+# inteiras. Nesse intervalo, leituras que precisariam de dados mais novos
+# vão para o SQLite, que responde sempre com o estado atual.
+DUCKDB_IDADE_MINIMA = 5.0
+
+
+class _SnapshotDuckDB:
+    def __init__(self, versao: int, con):
+        self.versao = versao
+        self.con = con
+        self.criado = time.monotonic()
+        self.em_uso = 0
+        self.substituido = False
+
+
+_duckdb_lock = threading.Lock()
+_duckdb_snapshots: dict[str, _SnapshotDuckDB] = {}
+_monitores: dict[str, sqlite3.Connection] = {}
+_monitores_lock = threading.Lock()
+
+
+def versao_dados() -> int:
+    """Versão do banco atual: muda sempre que outra conexão faz commit.
+
+    Usa PRAGMA data_version (vale também em WAL) numa conexão de
+    monitoramento que nunca escreve.
+    """
+    chave = str(caminho_db())
+    with _monitores_lock:
+        monitor = _monitores.get(chave)
+        if monitor is None:
+            monitor = sqlite3.connect(chave, check_same_thread=False)
+            _monitores[chave] = monitor
+        return monitor.execute("PRAGMA data_version").fetchone()[0]
+
+
+def _carregar_snapshot_duckdb():
+    import duckdb
+    import pandas as pd
+
+    con = duckdb.connect()
+    with _conn() as conn:
+        # Uma transação de leitura: as quatro tabelas vêm do mesmo estado
+        conn.execute("BEGIN")
+        for tabela in _TABELAS_ANALITICAS:
+            colunas = conn.execute(f"PRAGMA table_info({tabela})").fetchall()
+            nomes = [c["name"] for c in colunas]
+            ddl = ", ".join(
+                f'"{c["name"]}" {_TIPOS_DUCKDB.get(c["type"], c["type"] or "TEXT")}'
+                for c in colunas
+            )
+            con.execute(f"CREATE TABLE {tabela} ({ddl})")
+            df = pd.read_sql_query(f"SELECT * FROM {tabela}", conn)
+            if not df.empty:
+                con.register("_origem", df)
+                cols = ", ".join(f'"{n}"' for n in nomes)
+                con.execute(f"INSERT INTO {tabela} ({cols}) SELECT {cols} FROM _origem")
+                con.unregister("_origem")
+    return con
+
+
+@contextmanager
+def _duckdb_cursor():
+    """Cursor DuckDB sobre o snapshot atual do banco, ou None se ele estiver
+    desatualizado e tiver sido recarregado há menos de DUCKDB_IDADE_MINIMA.
+
+    Um snapshot substituído só é fechado quando o último cursor dele é
+    liberado (fechar a conexão mataria consultas de outras threads).
+    """
+    chave = str(caminho_db())
+    with _duckdb_lock:
+        versao = versao_dados()
+        atual = _duckdb_snapshots.get(chave)
+        if atual is None or atual.versao != versao:
+            if atual is not None and time.monotonic() - atual.criado < DUCKDB_IDADE_MINIMA:
+                atual = None
+            else:
+                if atual is not None:
+                    atual.substituido = True
+                    if not atual.em_uso:
+                        atual.con.close()
+                atual = _SnapshotDuckDB(versao, _carregar_snapshot_duckdb())
+                _duckdb_snapshots[chave] = atual
+        if atual is not None:
+            atual.em_uso += 1
+            cur = atual.con.cursor()
+    if atual is None:
+        yield None
+        return
+    try:
+        yield cur
+    finally:
+        cur.close()
+        with _duckdb_lock:
+            atual.em_uso -= 1
+            if atual.substituido and not atual.em_uso:
+                atual.con.close()
+
+
+def _consulta_analitica(sql: str, params: tuple, motor: str | None = None) -> list[dict]:
+    """Executa uma consulta somente leitura no motor analítico escolhido."""
+    motor = motor or MOTOR_ANALITICO
+    if motor == "duckdb":
+        with _duckdb_cursor() as cur:
+            if cur is not None:
+                cur.execute(sql, params)
+                colunas = [c[0] for c in cur.description]
+                return [dict(zip(colunas, r)) for r in cur.fetchall()]
+    elif motor != "sqlite":
+        raise ValueError(f"Motor analítico desconhecido: {motor}")
+    with _conn() as conn:
+        return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+
+# Linhas lidas por vez nas consultas que viram DataFrame
+_LINHAS_POR_BLOCO = 50_000
+
+
+def _consulta_analitica_df(sql: str, params: tuple, motor: str | None = None):
+    """Como _consulta_analitica, mas devolve um DataFrame (leitura colunar)."""
+    import pandas as pd
+
+    motor = motor or MOTOR_ANALITICO
+    if motor == "duckdb":
+        with _duckdb_cursor() as cur:
+            if cur is not None:
+                return cur.execute(sql, params).df()
+    elif motor != "sqlite":
+        raise ValueError(f"Motor analítico desconhecido: {motor}")
+    with _conn() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None  # tuplas: sqlite3.Row custa caro em leituras grandes
+        cur.execute(sql, params)
+        colunas = [c[0] for c in cur.description]
+        # Em blocos: só um bloco de tuplas Python existe por vez; o resto já
+        # está em arrays
+        blocos = []
+        while True:
+            linhas = cur.fetchmany(_LINHAS_POR_BLOCO)
+            if not linhas and blocos:
+                break
+            blocos.append(pd.DataFrame(
+                {nome: _coluna_numpy(linhas, i) for i, nome in enumerate(colunas)}, columns=colunas
+            ))
+            if len(linhas) < _LINHAS_POR_BLOCO:
+                break
+    return blocos[0] if len(blocos) == 1 else pd.concat(blocos, ignore_index=True)
+
+
+def _coluna_numpy(linhas: list, i: int):
+    # Colunas só de inteiros (centavos, ids) ou só de floats vão direto para
+    # arrays, bem mais rápido que a inferência de DataFrame.from_records;
+    # texto ou NULL ficam como lista.
+    import numpy as np
+
+    valores = [r[i] for r in linhas]
+    tipo = type(valores[0]) if valores else None
+    if tipo in (int, float) and all(type(v) is tipo for v in valores):
+        return np.fromiter(valores, np.int64 if tipo is int else np.float64, len(valores))
+    return valores
+
+
+# ── Dinheiro ──────────────────────────────────────
+# investimento e faturamento são guardados em centavos inteiros, então as
+# somas no SQL são exatas. As funções deste módulo recebem e devolvem reais.
+
+_COLUNAS_LANCAMENTO = """
+    id, cliente_id, data,
+    investimento_centavos / 100.0 AS investimento, leads, vendas,
+    faturamento_centavos / 100.0 AS faturamento, observacao, criado_em
+"""
+
+
+def para_centavos(reais: float | None) -> int:
+    return round((reais or 0) * 100)
 
 
 # ── Clientes ──────────────────────────────────────
@@ -157,8 +595,8 @@ def salvar_lancamento(
         # INSERT OR IGNORE preserva o id existente (evita CASCADE delete nas métricas)
         conn.execute(
             """INSERT OR IGNORE INTO lancamentos
-               (cliente_id, data, investimento, leads, vendas, faturamento, observacao)
-               VALUES (?, ?, 0, 0, 0, 0.0, ?)""",
+               (cliente_id, data, investimento_centavos, leads, vendas, faturamento_centavos, observacao)
+               VALUES (?, ?, 0, 0, 0, 0, ?)""",
             (cliente_id, data, observacao),
         )
         conn.execute(
@@ -182,26 +620,27 @@ def salvar_lancamento(
         # Limpar métricas antigas e inserir novas
         conn.execute("DELETE FROM metricas_produto WHERE lancamento_id = ?", (lancamento_id,))
 
-        total_inv = 0.0
+        # Totais em centavos: soma inteira, exata
+        total_inv = 0
         total_leads = 0
         total_vendas = 0
-        total_fat = 0.0
+        total_fat = 0
 
         if metricas_produtos:
             for m in metricas_produtos:
                 ex = existing_metricas.get(m["produto_id"], {})
                 # Se o formulário enviou zeros mas o BD já tinha dados, preservar BD
                 form_vazio = not any([m["investimento"], m["leads"], m["vendas"], m["faturamento"]])
-                tinha_dados = any([ex.get("investimento"), ex.get("leads"), ex.get("vendas"), ex.get("faturamento")])
+                tinha_dados = any([ex.get("investimento_centavos"), ex.get("leads"), ex.get("vendas"), ex.get("faturamento_centavos")])
                 if form_vazio and tinha_dados:
-                    inv_s = ex["investimento"]; leads_s = ex["leads"]
-                    vendas_s = ex["vendas"]; fat_s = ex["faturamento"]
+                    inv_s = ex["investimento_centavos"]; leads_s = ex["leads"]
+                    vendas_s = ex["vendas"]; fat_s = ex["faturamento_centavos"]
                 else:
-                    inv_s = m["investimento"]; leads_s = m["leads"]
-                    vendas_s = m["vendas"]; fat_s = m["faturamento"]
+                    inv_s = para_centavos(m["investimento"]); leads_s = m["leads"]
+                    vendas_s = m["vendas"]; fat_s = para_centavos(m["faturamento"])
                 conn.execute(
                     """INSERT INTO metricas_produto
-                       (lancamento_id, produto_id, investimento, leads, vendas, faturamento)
+                       (lancamento_id, produto_id, investimento_centavos, leads, vendas, faturamento_centavos)
                        VALUES (?, ?, ?, ?, ?, ?)""",
                     (lancamento_id, m["produto_id"], inv_s, leads_s, vendas_s, fat_s),
                 )
@@ -210,22 +649,24 @@ def salvar_lancamento(
                 total_vendas += vendas_s
                 total_fat += fat_s
         else:
-            total_inv = investimento
+            total_inv = para_centavos(investimento)
 
         # Atualizar totais no lançamento
         conn.execute(
             """UPDATE lancamentos
-               SET investimento = ?, leads = ?, vendas = ?, faturamento = ?
+               SET investimento_centavos = ?, leads = ?, vendas = ?, faturamento_centavos = ?
                WHERE id = ?""",
             (total_inv, total_leads, total_vendas, total_fat, lancamento_id),
         )
 
+        _atualizar_projecoes_do_dia(conn, cliente_id, date.fromisoformat(data))
+
 
 def listar_lancamentos_mes(cliente_id: int, ano: int, mes: int) -> list[dict]:
     prefix = f"{ano:04d}-{mes:02d}"
     with _conn() as conn:
         rows = conn.execute(
-            """SELECT * FROM lancamentos
+            f"""SELECT {_COLUNAS_LANCAMENTO} FROM lancamentos
                WHERE cliente_id = ? AND data LIKE ?
                ORDER BY data""",
             (cliente_id, f"{prefix}%"),
@@ -241,10 +682,90 @@ def listar_lancamentos_mes(cliente_id: int, ano: int, mes: int) -> list[dict]:
     return result
 
 
+def listar_lancamentos_periodo(
+    data_inicio: str,
+    data_fim: str,
+    cliente_id: int | None = None,
+    apos: tuple[int, str] | None = None,
+    limite: int = 50,
+) -> list[dict]:
+    """Página do histórico de lançamentos entre data_inicio e data_fim.
+
+    Paginação por chave (keyset) em (cliente_id, data): `apos` é a chave da
+    última linha da página anterior, então páginas profundas custam o mesmo
+    que a primeira. CPL, CPV e ROAS já vêm calculados do SQL.
+    """
+    sql = """SELECT l.id, l.cliente_id, c.nome as cliente_nome, l.data,
+                    l.investimento_centavos / 100.0 as investimento, l.leads, l.vendas,
+                    l.faturamento_centavos / 100.0 as faturamento, l.observacao,
+                    ROUND(l.investimento_centavos / 100.0 / NULLIF(l.leads, 0), 2) as cpl,
+                    ROUND(l.investimento_centavos / 100.0 / NULLIF(l.vendas, 0), 2) as cpv,
+                    ROUND(1.0 * l.faturamento_centavos / NULLIF(l.investimento_centavos, 0), 2) as roas
+             FROM lancamentos l
+             JOIN clientes c ON c.id = l.cliente_id"""
+    params: list = [data_inicio, data_fim]
+    if cliente_id is not None:
+        sql += " WHERE l.data BETWEEN ? AND ? AND l.cliente_id = ?"
+        params.append(cliente_id)
+    else:
+        # "+" tira idx_lancamentos_data do plano: com ele o SQLite lê e ordena
+        # o período inteiro a cada página em vez de seguir UNIQUE(cliente_id, data)
+        sql += " WHERE +l.data BETWEEN ? AND ?"
+    if apos is not None:
+        sql += " AND (l.cliente_id, l.data) > (?, ?)"
+        params.extend(apos)
+    sql += " ORDER BY l.cliente_id, l.data LIMIT ?"
+    params.append(limite)
+    with _conn() as conn:
+        return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+
+def _consulta_fts(termo: str) -> str:
+    # Cada palavra vira um termo entre aspas com busca por prefixo (AND implícito),
+    # assim a entrada do usuário nunca é interpretada como sintaxe FTS5.
+    palavras = termo.split()
+    return " ".join('"' + p.replace('"', '""') + '"*' for p in palavras)
+
+
+def buscar_lancamentos(
+    termo: str,
+    cliente_id: int | None = None,
+    limite: int = 20,
+    pagina: int = 0,
+) -> list[dict]:
+    """Busca textual nas observações, ordenada por relevância (bm25).
+
+    Retorna os dias encontrados com seus KPIs e um trecho destacado da
+    observação. `pagina` começa em 0.
+    """
+    consulta = _consulta_fts(termo)
+    if not consulta:
+        return []
+    sql = """SELECT l.id, l.cliente_id, c.nome as cliente_nome, l.data,
+                    l.investimento_centavos / 100.0 as investimento, l.leads, l.vendas,
+                    l.faturamento_centavos / 100.0 as faturamento, l.observacao,
+                    ROUND(l.investimento_centavos / 100.0 / NULLIF(l.leads, 0), 2) as cpl,
+                    ROUND(l.investimento_centavos / 100.0 / NULLIF(l.vendas, 0), 2) as cpv,
+                    ROUND(1.0 * l.faturamento_centavos / NULLIF(l.investimento_centavos, 0), 2) as roas,
+                    snippet(lancamentos_fts, 0, '«', '»', '…', 12) as trecho
+             FROM lancamentos_fts
+             JOIN lancamentos l ON l.id = lancamentos_fts.rowid
+             JOIN clientes c ON c.id = l.cliente_id
+             WHERE lancamentos_fts MATCH ?"""
+    params: list = [consulta]
+    if cliente_id is not None:
+        sql += " AND l.cliente_id = ?"
+        params.append(cliente_id)
+    sql += " ORDER BY bm25(lancamentos_fts), l.data DESC LIMIT ? OFFSET ?"
+    params.extend([limite, pagina * limite])
+    with _conn() as conn:
+        return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+
 def obter_lancamento(cliente_id: int, data: str) -> dict | None:
     with _conn() as conn:
         row = conn.execute(
-            "SELECT * FROM lancamentos WHERE cliente_id = ? AND data = ?",
+            f"SELECT {_COLUNAS_LANCAMENTO} FROM lancamentos WHERE cliente_id = ? AND data = ?",
             (cliente_id, data),
         ).fetchone()
         return dict(row) if row else None
@@ -253,7 +774,9 @@ def obter_lancamento(cliente_id: int, data: str) -> dict | None:
 def obter_metricas_produto(lancamento_id: int) -> list[dict]:
     with _conn() as conn:
         rows = conn.execute(
-            """SELECT mp.*, p.nome as produto_nome
+            """SELECT mp.id, mp.lancamento_id, mp.produto_id,
+                      mp.investimento_centavos / 100.0 AS investimento, mp.leads, mp.vendas,
+                      mp.faturamento_centavos / 100.0 AS faturamento, p.nome as produto_nome
                FROM metricas_produto mp
                JOIN produtos p ON p.id = mp.produto_id
                WHERE mp.lancamento_id = ?
@@ -265,89 +788,443 @@ def obter_metricas_produto(lancamento_id: int) -> list[dict]:
 
 def excluir_lancamento(lancamento_id: int):
     with _conn() as conn:
+        row = conn.execute(
+            "SELECT cliente_id, data FROM lancamentos WHERE id = ?", (lancamento_id,)
+        ).fetchone()
         conn.execute("DELETE FROM metricas_produto WHERE lancamento_id = ?", (lancamento_id,))
         conn.execute("DELETE FROM lancamentos WHERE id = ?", (lancamento_id,))
+        if row:
+            _atualizar_projecoes_do_dia(conn, row["cliente_id"], date.fromisoformat(row["data"]))
 
 
-def resumo_mensal(cliente_id: int, ano: int, mes: int) -> dict:
+def resumo_mensal(cliente_id: int, ano: int, mes: int, motor: str | None = None) -> dict:
     prefix = f"{ano:04d}-{mes:02d}"
-    with _conn() as conn:
-        row = conn.execute(
-            """SELECT
-                 COALESCE(SUM(investimento), 0) as total_investido,
-                 COALESCE(SUM(leads), 0) as total_leads,
-                 COALESCE(SUM(vendas), 0) as total_vendas,
-                 COALESCE(SUM(faturamento), 0) as total_faturamento,
-                 COUNT(*) as dias
-               FROM lancamentos
-               WHERE cliente_id = ? AND data LIKE ?""",
-            (cliente_id, f"{prefix}%"),
-        ).fetchone()
-        d = dict(row)
-        d["cpl_medio"] = (
-            round(d["total_investido"] / d["total_leads"], 2)
-            if d["total_leads"]
-            else None
-        )
-        d["cpv_medio"] = (
-            round(d["total_investido"] / d["total_vendas"], 2)
-            if d["total_vendas"]
-            else None
-        )
-        d["roas"] = (
-            round(d["total_faturamento"] / d["total_investido"], 2)
-            if d["total_investido"]
-            else None
-        )
-        return d
+    d = _consulta_analitica(
+        """SELECT
+             COALESCE(SUM(investimento_centavos), 0) / 100.0 as total_investido,
+             COALESCE(SUM(leads), 0) as total_leads,
+             COALESCE(SUM(vendas), 0) as total_vendas,
+             COALESCE(SUM(faturamento_centavos), 0) / 100.0 as total_faturamento,
+             COUNT(*) as dias
+           FROM lancamentos
+           WHERE cliente_id = ? AND data LIKE ?""",
+        (cliente_id, f"{prefix}%"),
+        motor,
+    )[0]
+    d["cpl_medio"] = (
+        round(d["total_investido"] / d["total_leads"], 2)
+        if d["total_leads"]
+        else None
+    )
+    d["cpv_medio"] = (
+        round(d["total_investido"] / d["total_vendas"], 2)
+        if d["total_vendas"]
+        else None
+    )
+    d["roas"] = (
+        round(d["total_faturamento"] / d["total_investido"], 2)
+        if d["total_investido"]
+        else None
+    )
+    return d
+
+
+def resumo_mensal_por_produto(
+    cliente_id: int, ano: int, mes: int, motor: str | None = None
+) -> list[dict]:
+    prefix = f"{ano:04d}-{mes:02d}"
+    rows = _consulta_analitica(
+        """SELECT
+             p.id as produto_id,
+             p.nome as produto_nome,
+             COALESCE(SUM(mp.investimento_centavos), 0) / 100.0 as total_investimento,
+             COALESCE(SUM(mp.leads), 0) as total_leads,
+             COALESCE(SUM(mp.vendas), 0) as total_vendas,
+             COALESCE(SUM(mp.faturamento_centavos), 0) / 100.0 as total_faturamento
+           FROM metricas_produto mp
+           JOIN lancamentos l ON l.id = mp.lancamento_id
+           JOIN produtos p ON p.id = mp.produto_id
+           WHERE l.cliente_id = ? AND l.data LIKE ?
+           GROUP BY p.id, p.nome
+           ORDER BY p.nome""",
+        (cliente_id, f"{prefix}%"),
+        motor,
+    )
+    result = []
+    for d in rows:
+        inv = d["total_investimento"]
+        d["roas"] = round(d["total_faturamento"] / inv, 2) if inv else None
+        d["cpl"] = round(inv / d["total_leads"], 2) if d["total_leads"] else None
+        d["conversao"] = round(d["total_vendas"] / d["total_leads"] * 100, 1) if d["total_leads"] else None
+        result.append(d)
+    return result
 
 
-def resumo_mensal_por_produto(cliente_id: int, ano: int, mes: int) -> list[dict]:
+def metricas_diarias_por_produto(
+    cliente_id: int, ano: int, mes: int, motor: str | None = None
+) -> list[dict]:
     prefix = f"{ano:04d}-{mes:02d}"
+    return _consulta_analitica(
+        """SELECT
+             l.data,
+             p.nome as produto_nome,
+             mp.investimento_centavos / 100.0 as investimento,
+             mp.leads,
+             mp.vendas,
+             mp.faturamento_centavos / 100.0 as faturamento
+           FROM metricas_produto mp
+           JOIN lancamentos l ON l.id = mp.lancamento_id
+           JOIN produtos p ON p.id = mp.produto_id
+           WHERE l.cliente_id = ? AND l.data LIKE ?
+           ORDER BY l.data, p.nome""",
+        (cliente_id, f"{prefix}%"),
+        motor,
+    )
+
+
+def resumo_por_cliente(
+    data_inicio: str, data_fim: str, motor: str | None = None
+) -> list[dict]:
+    """Totais por cliente ativo entre data_inicio e data_fim (inclusive).
+
+    Relatório de carteira: cruza clientes e pode cobrir vários anos.
+    """
+    rows = _consulta_analitica(
+        """SELECT
+             c.id as cliente_id,
+             c.nome as cliente_nome,
+             COALESCE(SUM(l.investimento_centavos), 0) / 100.0 as total_investido,
+             COALESCE(SUM(l.leads), 0) as total_leads,
+             COALESCE(SUM(l.vendas), 0) as total_vendas,
+             COALESCE(SUM(l.faturamento_centavos), 0) / 100.0 as total_faturamento,
+             COUNT(l.id) as dias
+           FROM clientes c
+           LEFT JOIN lancamentos l
+             ON l.cliente_id = c.id AND l.data BETWEEN ? AND ?
+           WHERE c.ativo = 1
+           GROUP BY c.id, c.nome
+           ORDER BY c.nome""",
+        (data_inicio, data_fim),
+        motor,
+    )
+    for d in rows:
+        inv = d["total_investido"]
+        d["roas"] = round(d["total_faturamento"] / inv, 2) if inv else None
+        d["cpl_medio"] = round(inv / d["total_leads"], 2) if d["total_leads"] else None
+    return rows
+
+
+# ── Reconciliação ─────────────────────────────────
+# Os totais em lancamentos são cópias da soma de metricas_produto.
+# Lançamentos sem métricas por produto (investimento genérico) não entram.
+
+_SOMAS_POR_LANCAMENTO = """
+    SELECT mp.lancamento_id,
+           SUM(mp.investimento_centavos) AS investimento_centavos,
+           SUM(mp.leads) AS leads,
+           SUM(mp.vendas) AS vendas,
+           SUM(mp.faturamento_centavos) AS faturamento_centavos
+    FROM metricas_produto mp
+    JOIN lancamentos l ON l.id = mp.lancamento_id
+    WHERE l.cliente_id = ? AND l.data BETWEEN ? AND ?
+    GROUP BY mp.lancamento_id
+"""
+
+_DIVERGENTE = """
+    lancamentos.id = s.lancamento_id
+    AND (lancamentos.investimento_centavos <> s.investimento_centavos
+         OR lancamentos.leads <> s.leads
+         OR lancamentos.vendas <> s.vendas
+         OR lancamentos.faturamento_centavos <> s.faturamento_centavos)
+"""
+
+
+def reconciliar_totais(
+    cliente_id: int | None = None,
+    data_inicio: str | None = None,
+    data_fim: str | None = None,
+    dias_por_lote: int = 92,
+    corrigir: bool = True,
+) -> dict:
+    """Corrige os totais de lancamentos que divergem de metricas_produto.
+
+    Processa em lotes (cliente x intervalo de datas), cada um em sua própria
+    transação curta, para não segurar o lock de escrita enquanto o app é usado.
+    Com corrigir=False apenas conta as divergências.
+    Retorna {"lotes", "divergentes", "corrigidos", "segundos"}.
+    """
+    inicio = time.perf_counter()
+    sql = "SELECT cliente_id, MIN(data) AS ini, MAX(data) AS fim FROM lancamentos"
+    params: list = []
+    if cliente_id is not None:
+        sql += " WHERE cliente_id = ?"
+        params.append(cliente_id)
+    sql += " GROUP BY cliente_id ORDER BY cliente_id"
+
+    resultado = {"lotes": 0, "divergentes": 0, "corrigidos": 0}
     with _conn() as conn:
-        rows = conn.execute(
-            """SELECT
-                 p.id as produto_id,
-                 p.nome as produto_nome,
-                 COALESCE(SUM(mp.investimento), 0) as total_investimento,
-                 COALESCE(SUM(mp.leads), 0) as total_leads,
-                 COALESCE(SUM(mp.vendas), 0) as total_vendas,
-                 COALESCE(SUM(mp.faturamento), 0) as total_faturamento
-               FROM metricas_produto mp
-               JOIN lancamentos l ON l.id = mp.lancamento_id
-               JOIN produtos p ON p.id = mp.produto_id
-               WHERE l.cliente_id = ? AND l.data LIKE ?
-               GROUP BY p.id, p.nome
-               ORDER BY p.nome""",
-            (cliente_id, f"{prefix}%"),
-        ).fetchall()
-        result = []
-        for r in rows:
-            d = dict(r)
-            inv = d["total_investimento"]
-            d["roas"] = round(d["total_faturamento"] / inv, 2) if inv else None
-            d["cpl"] = round(inv / d["total_leads"], 2) if d["total_leads"] else None
-            d["conversao"] = round(d["total_vendas"] / d["total_leads"] * 100, 1) if d["total_leads"] else None
-            result.append(d)
-        return result
+        faixas = conn.execute(sql, params).fetchall()
+        for faixa in faixas:
+            ini = date.fromisoformat(max(faixa["ini"], data_inicio or faixa["ini"]))
+            fim = date.fromisoformat(min(faixa["fim"], data_fim or faixa["fim"]))
+            while ini <= fim:
+                fim_lote = min(ini + timedelta(days=dias_por_lote - 1), fim)
+                lote = (faixa["cliente_id"], ini.isoformat(), fim_lote.isoformat())
+                with conn:
+                    if corrigir:
+                        dias = conn.execute(
+                            f"""UPDATE lancamentos
+                                SET investimento_centavos = s.investimento_centavos, leads = s.leads,
+                                    vendas = s.vendas, faturamento_centavos = s.faturamento_centavos
+                                FROM ({_SOMAS_POR_LANCAMENTO}) AS s
+                                WHERE {_DIVERGENTE}
+                                RETURNING lancamentos.data""",
+                            lote,
+                        ).fetchall()
+                        resultado["corrigidos"] += len(dias)
+                        resultado["divergentes"] += len(dias)
+                        # Projeções dos meses corrigidos (o último dia de cada
+                        # mês alcança todos os meses seguintes que dependem dele)
+                        ultimos = {}
+                        for r in dias:
+                            ultimos[r["data"][:7]] = max(ultimos.get(r["data"][:7], ""), r["data"])
+                        for dia in ultimos.values():
+                            _atualizar_projecoes_do_dia(conn, faixa["cliente_id"], date.fromisoformat(dia))
+                    else:
+                        resultado["divergentes"] += conn.execute(
+                            f"""SELECT COUNT(*) FROM lancamentos
+                                JOIN ({_SOMAS_POR_LANCAMENTO}) AS s
+                                ON {_DIVERGENTE}""",
+                            lote,
+                        ).fetchone()[0]
+                resultado["lotes"] += 1
+                ini = fim_lote + timedelta(days=1)
+    resultado["segundos"] = round(time.perf_counter() - inicio, 3)
+    return resultado
+
 
+# ── Séries diárias e alertas ──────────────────────
+
+def series_diarias(data_inicio: str, data_fim: str, motor: str | None = None):
+    """Séries diárias de todos os clientes ativos, por produto e total.
+
+    produto_id 0 é o total do cliente (lancamentos); os demais vêm de
+    metricas_produto. Devolve um DataFrame, lido em lote para os jobs de
+    análise, com os valores em centavos (investimento_centavos, faturamento_centavos).
+    """
+    return _consulta_analitica_df(
+        """SELECT l.cliente_id, mp.produto_id, l.data, mp.investimento_centavos, mp.faturamento_centavos
+           FROM metricas_produto mp
+           JOIN lancamentos l ON l.id = mp.lancamento_id
+           JOIN clientes c ON c.id = l.cliente_id
+           WHERE c.ativo = 1 AND l.data BETWEEN ? AND ?
+           UNION ALL
+           SELECT l.cliente_id, 0, l.data, l.investimento_centavos, l.faturamento_centavos
+           FROM lancamentos l
+           JOIN clientes c ON c.id = l.cliente_id
+           WHERE c.ativo = 1 AND l.data BETWEEN ? AND ?""",
+        (data_inicio, data_fim, data_inicio, data_fim),
+        motor,
+    )
 
-def metricas_diarias_por_produto(cliente_id: int, ano: int, mes: int) -> list[dict]:
+
+def substituir_alertas(data_inicio: str, data_fim: str, alertas: list[tuple]):
+    """Troca os alertas do período pelos recém-calculados.
+
+    alertas: tuplas (cliente_id, produto_id, data, metrica, valor, referencia, escore).
+    """
+    with _conn() as conn:
+        conn.execute("DELETE FROM alertas WHERE data BETWEEN ? AND ?", (data_inicio, data_fim))
+        conn.executemany(
+            """INSERT INTO alertas
+               (cliente_id, produto_id, data, metrica, valor, referencia, escore)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            alertas,
+        )
+
+
+def listar_alertas(cliente_id: int, ano: int, mes: int) -> list[dict]:
     prefix = f"{ano:04d}-{mes:02d}"
     with _conn() as conn:
         rows = conn.execute(
-            """SELECT
-                 l.data,
-                 p.nome as produto_nome,
-                 mp.investimento,
-                 mp.leads,
-                 mp.vendas,
-                 mp.faturamento
-               FROM metricas_produto mp
-               JOIN lancamentos l ON l.id = mp.lancamento_id
-               JOIN produtos p ON p.id = mp.produto_id
-               WHERE l.cliente_id = ? AND l.data LIKE ?
-               ORDER BY l.data, p.nome""",
+            """SELECT a.*, COALESCE(p.nome, 'Total') as produto_nome
+               FROM alertas a
+               LEFT JOIN produtos p ON p.id = a.produto_id
+               WHERE a.cliente_id = ? AND a.data LIKE ?
+               ORDER BY a.data DESC, ABS(a.escore) DESC""",
             (cliente_id, f"{prefix}%"),
         ).fetchall()
         return [dict(r) for r in rows]
+
+
+def obter_controle(chave: str) -> str | None:
+    with _conn() as conn:
+        row = conn.execute("SELECT valor FROM controle WHERE chave = ?", (chave,)).fetchone()
+        return row["valor"] if row else None
+
+
+def definir_controle(chave: str, valor: str):
+    with _conn() as conn:
+        conn.execute(
+            "INSERT INTO controle (chave, valor) VALUES (?, ?) "
+            "ON CONFLICT(chave) DO UPDATE SET valor = excluded.valor",
+            (chave, valor),
+        )
+
+
+# ── Projeção de verba (pacing) ────────────────────
+# Gasto projetado para o fim do mês: gasto até o último dia lançado + ritmo
+# diário recente para os dias restantes, ajustado pelo peso de cada dia da
+# semana. Guardado em projecoes e atualizado a cada salvar/excluir lançamento
+# (no mês do dia e nos meses seguintes já guardados que dependem dele).
+
+JANELA_RITMO_DIAS = 14
+JANELA_SAZONALIDADE_DIAS = 56
+
+
+def _limites_mes(ano: int, mes: int) -> tuple[date, date]:
+    inicio = date(ano, mes, 1)
+    proximo = date(ano + mes // 12, mes % 12 + 1, 1)
+    return inicio, proximo - timedelta(days=1)
+
+
+def _projetar_serie(diario: dict[date, int], inicio_mes: date, fim_mes: date) -> dict:
+    # diario em centavos; gasto e projeção saem em reais
+    no_mes = [d for d in diario if inicio_mes <= d <= fim_mes]
+    gasto = sum(diario[d] for d in no_mes)
+    ref = max(no_mes) if no_mes else inicio_mes - timedelta(days=1)
+
+    recentes = [v for d, v in diario.items() if ref - timedelta(days=JANELA_RITMO_DIAS) < d <= ref]
+    ritmo = sum(recentes) / len(recentes) if recentes else 0.0
+
+    # Peso de cada dia da semana em relação à média (1.0 sem histórico suficiente)
+    base = [(d, v) for d, v in diario.items() if ref - timedelta(days=JANELA_SAZONALIDADE_DIAS) < d <= ref]
+    media = sum(v for _, v in base) / len(base) if base else 0.0
+    fatores = [1.0] * 7
+    if media > 0:
+        por_dia_semana = defaultdict(list)
+        for d, v in base:
+            por_dia_semana[d.weekday()].append(v)
+        for dia_semana, valores in por_dia_semana.items():
+            if len(valores) >= 2:
+                fatores[dia_semana] = sum(valores) / len(valores) / media
+
+    restante = sum(
+        ritmo * fatores[(ref + timedelta(days=i)).weekday()]
+        for i in range(1, (fim_mes - ref).days + 1)
+    )
+    return {
+        "gasto": gasto / 100,
+        "projecao": round((gasto + restante) / 100, 2),
+        "dias_com_dado": len(no_mes),
+        "ultima_data": ref.isoformat() if no_mes else None,
+    }
+
+
+def _calcular_projecoes(conn: sqlite3.Connection, cliente_id: int, ano: int, mes: int) -> dict[int, dict]:
+    """Projeção de cada série do cliente no mês: {produto_id: projeção} (0 = total)."""
+    inicio_mes, fim_mes = _limites_mes(ano, mes)
+    inicio_base = inicio_mes - timedelta(days=JANELA_SAZONALIDADE_DIAS)
+    rows = conn.execute(
+        """SELECT mp.produto_id, l.data, mp.investimento_centavos
+           FROM metricas_produto mp
+           JOIN lancamentos l ON l.id = mp.lancamento_id
+           WHERE l.cliente_id = ? AND l.data BETWEEN ? AND ?
+           UNION ALL
+           SELECT 0, data, investimento_centavos FROM lancamentos
+           WHERE cliente_id = ? AND data BETWEEN ? AND ?""",
+        (cliente_id, inicio_base.isoformat(), fim_mes.isoformat()) * 2,
+    ).fetchall()
+    series: dict[int, dict[date, int]] = defaultdict(dict)
+    series[0] = {}
+    for r in rows:
+        series[r["produto_id"]][date.fromisoformat(r["data"])] = r["investimento_centavos"]
+    return {
+        produto_id: _projetar_serie(diario, inicio_mes, fim_mes)
+        for produto_id, diario in series.items()
+    }
+
+
+def _atualizar_projecoes(conn: sqlite3.Connection, cliente_id: int, ano: int, mes: int):
+    ano_mes = f"{ano:04d}-{mes:02d}"
+    conn.execute(
+        "DELETE FROM projecoes WHERE cliente_id = ? AND ano_mes = ?", (cliente_id, ano_mes)
+    )
+    conn.executemany(
+        """INSERT INTO projecoes
+           (cliente_id, produto_id, ano_mes, gasto, projecao, dias_com_dado, ultima_data)
+           VALUES (?, ?, ?, ?, ?, ?, ?)""",
+        [
+            (cliente_id, produto_id, ano_mes, p["gasto"], p["projecao"], p["dias_com_dado"], p["ultima_data"])
+            for produto_id, p in _calcular_projecoes(conn, cliente_id, ano, mes).items()
+        ],
+    )
+
+
+def _atualizar_projecoes_do_dia(conn: sqlite3.Connection, cliente_id: int, dia: date):
+    # O mês do dia e os meses seguintes já guardados cuja janela de
+    # sazonalidade alcança o dia (o ritmo de um mês sem lançamentos ainda
+    # vem inteiro do mês anterior)
+    _atualizar_projecoes(conn, cliente_id, dia.year, dia.month)
+    ultimo = dia + timedelta(days=JANELA_SAZONALIDADE_DIAS)
+    seguintes = conn.execute(
+        """SELECT DISTINCT ano_mes FROM projecoes
+           WHERE cliente_id = ? AND ano_mes > ? AND ano_mes <= ?""",
+        (cliente_id, f"{dia.year:04d}-{dia.month:02d}", f"{ultimo.year:04d}-{ultimo.month:02d}"),
+    ).fetchall()
+    for r in seguintes:
+        ano, mes = map(int, r["ano_mes"].split("-"))
+        _atualizar_projecoes(conn, cliente_id, ano, mes)
+
+
+def recalcular_projecoes(ano: int, mes: int, clientes: list[int] | None = None) -> int:
+    """Recalcula as projeções do mês (todos os clientes ativos por padrão)."""
+    with _conn() as conn:
+        if clientes is None:
+            clientes = [r["id"] for r in conn.execute("SELECT id FROM clientes WHERE ativo = 1")]
+        for cliente_id in clientes:
+            _atualizar_projecoes(conn, cliente_id, ano, mes)
+    return len(clientes)
+
+
+def obter_projecao(cliente_id: int, ano: int, mes: int) -> dict | None:
+    """Projeção do total do cliente no mês.
+
+    Só lê: se ainda não foi guardada, é calculada na hora sem gravar, para
+    que o pré-carregamento não faça escritas (que invalidam os caches).
+    """
+    ano_mes = f"{ano:04d}-{mes:02d}"
+    with _conn() as conn:
+        row = conn.execute(
+            "SELECT * FROM projecoes WHERE cliente_id = ? AND produto_id = 0 AND ano_mes = ?",
+            (cliente_id, ano_mes),
+        ).fetchone()
+        if row is not None:
+            return dict(row)
+        p = _calcular_projecoes(conn, cliente_id, ano, mes)[0]
+    return {"cliente_id": cliente_id, "produto_id": 0, "ano_mes": ano_mes, **p, "atualizado_em": None}
+
+
+def listar_projecoes(ano: int, mes: int) -> list[dict]:
+    """Projeção do mês para cada cliente ativo, com a verba, para a visão de carteira."""
+    ano_mes = f"{ano:04d}-{mes:02d}"
+    sql = """SELECT c.id as cliente_id, c.nome as cliente_nome, c.verba_mensal,
+                    p.gasto, p.projecao, p.dias_com_dado, p.ultima_data
+             FROM clientes c
+             LEFT JOIN projecoes p
+               ON p.cliente_id = c.id AND p.produto_id = 0 AND p.ano_mes = ?
+             WHERE c.ativo = 1
+             ORDER BY c.nome"""
+    result = []
+    with _conn() as conn:
+        for r in conn.execute(sql, (ano_mes,)).fetchall():
+            d = dict(r)
+            if d["projecao"] is None:
+                # Como em obter_projecao: calcula sem gravar
+                p = _calcular_projecoes(conn, d["cliente_id"], ano, mes)[0]
+                d.update(gasto=p["gasto"], projecao=p["projecao"],
+                         dias_com_dado=p["dias_com_dado"], ultima_data=p["ultima_data"])
+            verba = d["verba_mensal"]
+            d["pct_projetado"] = round(d["projecao"] / verba, 4) if verba else None
+            result.append(d)
+    return result
@@ -0,0 +1,55 @@
+import functools
+import logging
+import time
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+logger = logging.getLogger(__name__)
+
+_CHAVE_TEMPOS = "_tempos_secoes"
+_CHAVE_MOSTRAR = "_mostrar_tempos"
+
+
+def cronometrar(secao: str):
+    """Mede o tempo de execução de uma seção da página.
+
+    Guarda a duração da última execução em st.session_state e, com
+    "Mostrar nas seções" ligado, escreve o tempo no fim da própria seção: é
+    o único lugar atualizado quando um fragmento reexecuta isolado (a
+    sidebar só é redesenhada no rerun completo).
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                resultado = func(*args, **kwargs)
+            finally:
+                ms = (time.perf_counter() - inicio) * 1000
+                st.session_state.setdefault(_CHAVE_TEMPOS, {})[secao] = ms
+                logger.debug("seção %s executada em %.1f ms", secao, ms)
+            if st.session_state.get(_CHAVE_MOSTRAR):
+                ctx = get_script_run_ctx(suppress_warning=True)
+                isolado = bool(ctx and ctx.fragment_ids_this_run)
+                st.caption(f"⏱ {secao}: {ms:,.1f} ms{' (só o fragmento)' if isolado else ''}")
+            return resultado
+        return wrapper
+    return decorador
+
+
+def tempos_secoes() -> dict[str, float]:
+    """Retorna {seção: ms} da última execução de cada seção."""
+    return dict(st.session_state.get(_CHAVE_TEMPOS, {}))
+
+
+def exibir_tempos():
+    """Mostra na sidebar o tempo de cada seção no último rerun completo."""
+    tempos = tempos_secoes()
+    if not tempos:
+        return
+    with st.sidebar.expander("Tempos de execução"):
+        st.toggle("Mostrar nas seções", key=_CHAVE_MOSTRAR,
+                  help="Inclui os reruns isolados de fragmentos")
+        for secao, ms in tempos.items():
+            st.caption(f"{secao}: {ms:,.1f} ms")
@@ -0,0 +1,36 @@
+"""Roda a detecção de anomalias de gasto/ROAS em todos os clientes ativos.
+
+Uso: python -m ferramentas.anomalias [--desde AAAA-MM-DD] [--ate AAAA-MM-DD]
+Sem --desde, processa só os dias novos desde a última execução.
+"""
+import argparse
+from datetime import date
+from pathlib import Path
+
+import database
+from anomalias import detectar_anomalias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="arquivo SQLite (padrão: data/traffic.db)")
+    parser.add_argument("--workspace", help="workspace (agência); padrão: banco principal")
+    parser.add_argument("--desde", type=date.fromisoformat)
+    parser.add_argument("--ate", type=date.fromisoformat)
+    parser.add_argument("--motor", choices=["sqlite", "duckdb"])
+    args = parser.parse_args()
+
+    if args.db:
+        database.DB_PATH = Path(args.db)
+    if args.workspace:
+        database.usar_workspace(args.workspace)
+    database.init_db()
+    r = detectar_anomalias(args.desde, args.ate, motor=args.motor)
+    print(
+        f"{r['series']} séries, {r['dias_avaliados']} dias avaliados, "
+        f"{r['alertas']} alertas em {r['segundos']:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
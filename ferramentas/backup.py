@@ -0,0 +1,309 @@
+"""Backups online do banco via API de backup do SQLite.
+
+Uso:
+  python -m ferramentas.backup criar  [--destino backups/] [--gzip]
+  python -m ferramentas.backup agendar --intervalo 3600 --manter 24 [--gzip]
+  python -m ferramentas.backup verificar backups/traffic-20260101-120000-000000.db.gz
+  python -m ferramentas.backup restaurar backups/traffic-20260101-120000-000000.db.gz
+  python -m ferramentas.backup medir   (impacto do backup na latência de escrita)
+
+Snapshots de um workspace (--workspace) ficam em <destino>/workspaces/<nome>/.
+"""
+import argparse
+import gzip
+import re
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import database
+
+TABELAS = ("clientes", "produtos", "lancamentos", "metricas_produto")
+
+
+class _MuitosReinicios(Exception):
+    pass
+
+
+def _copiar_online(origem: sqlite3.Connection, destino: sqlite3.Connection,
+                   paginas_por_passo: int, pausa: float, max_reinicios: int = 3) -> dict:
+    # Copia em passos pequenos com pausa entre eles, liberando o banco para as
+    # escritas. Cada escrita de outra conexão reinicia a cópia; se isso se
+    # repetir, termina em um passo só (em WAL a leitura não bloqueia escritores).
+    estado = {"passos": 0, "reinicios": 0, "passo_unico": False}
+    restantes_ant = None
+
+    def progresso(status, restantes, total):
+        nonlocal restantes_ant
+        estado["passos"] += 1
+        if restantes_ant is not None and restantes > restantes_ant:
+            estado["reinicios"] += 1
+            if estado["reinicios"] > max_reinicios:
+                raise _MuitosReinicios
+        restantes_ant = restantes
+        if restantes:
+            time.sleep(pausa)
+
+    try:
+        origem.backup(destino, pages=paginas_por_passo, progress=progresso)
+    except _MuitosReinicios:
+        origem.backup(destino, pages=-1)
+        estado["passos"] += 1
+        estado["passo_unico"] = True
+    return estado
+
+
+def _pasta_snapshots(destino: str | Path) -> Path:
+    """Pasta dos snapshots do banco atual: cada workspace tem a sua.
+
+    O nome do arquivo sozinho não separa os bancos: o workspace "traffic"
+    e o banco padrão data/traffic.db teriam os mesmos nomes.
+    """
+    nome = database.workspace_atual()
+    return Path(destino) / "workspaces" / nome if nome else Path(destino)
+
+
+def criar_backup(
+    destino: str | Path = "backups",
+    comprimir: bool = False,
+    paginas_por_passo: int = 256,
+    pausa: float = 0.005,
+) -> dict:
+    """Cria um snapshot consistente do banco atual sem bloquear os usuários.
+
+    Retorna {"arquivo", "bytes", "passos", "reinicios", "passo_unico", "segundos"}.
+    """
+    inicio = time.perf_counter()
+    destino = _pasta_snapshots(destino)
+    destino.mkdir(parents=True, exist_ok=True)
+    # Microssegundos no nome: dois snapshots no mesmo segundo não colidem;
+    # se ainda assim o nome existir, falha em vez de sobrescrever
+    nome = f"{database.caminho_db().stem}-{datetime.now():%Y%m%d-%H%M%S-%f}.db"
+    arquivo = destino / nome
+    if Path(f"{arquivo}.gz").exists():
+        raise FileExistsError(f"{arquivo}.gz")
+    arquivo.open("x").close()
+
+    origem = sqlite3.connect(str(database.caminho_db()))
+    copia = sqlite3.connect(str(arquivo))
+    try:
+        copia_info = _copiar_online(origem, copia, paginas_por_passo, pausa)
+    finally:
+        copia.close()
+        origem.close()
+
+    if comprimir:
+        with open(arquivo, "rb") as f_in, gzip.open(f"{arquivo}.gz", "wb", compresslevel=6) as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        arquivo.unlink()
+        arquivo = Path(f"{arquivo}.gz")
+
+    return {
+        "arquivo": str(arquivo),
+        "bytes": arquivo.stat().st_size,
+        **copia_info,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+
+
+def aplicar_retencao(destino: str | Path, manter: int) -> list[str]:
+    """Remove os snapshots mais antigos, mantendo os `manter` mais recentes."""
+    # Na pasta do banco padrão podem restar snapshots de workspaces do
+    # layout antigo ("traffic-b-..." casaria com "traffic-*"), então o
+    # carimbo de data é conferido inteiro
+    stem = database.caminho_db().stem
+    padrao = re.compile(rf"{re.escape(stem)}-\d{{8}}-\d{{6}}(-\d{{6}})?\.db(\.gz)?")
+    pasta = _pasta_snapshots(destino)
+    snapshots = sorted(p for p in pasta.glob(f"{stem}-*") if padrao.fullmatch(p.name))
+    removidos = snapshots[:-manter] if manter > 0 else []
+    for s in removidos:
+        s.unlink()
+    return [str(s) for s in removidos]
+
+
+def _abrir_snapshot(arquivo: Path) -> tuple[Path, bool]:
+    # Snapshots comprimidos são extraídos para um arquivo temporário
+    if arquivo.suffix != ".gz":
+        return arquivo, False
+    tmp = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    with gzip.open(arquivo, "rb") as f_in, tmp:
+        shutil.copyfileobj(f_in, tmp)
+    return Path(tmp.name), True
+
+
+def verificar_backup(arquivo: str | Path) -> dict:
+    """Roda integrity_check e conta as linhas de cada tabela do snapshot."""
+    caminho, temporario = _abrir_snapshot(Path(arquivo))
+    try:
+        conn = sqlite3.connect(f"{caminho.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            integridade = conn.execute("PRAGMA integrity_check").fetchone()[0]
+            contagens = {
+                t: conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in TABELAS
+            }
+        finally:
+            conn.close()
+    finally:
+        if temporario:
+            caminho.unlink()
+    return {"ok": integridade == "ok", "integridade": integridade, "linhas": contagens}
+
+
+def restaurar_backup(arquivo: str | Path, paginas_por_passo: int = 256) -> dict:
+    """Verifica o snapshot e o copia sobre o banco atual pela API de backup."""
+    verificacao = verificar_backup(arquivo)
+    if not verificacao["ok"]:
+        raise ValueError(f"Backup corrompido: {verificacao['integridade']}")
+    inicio = time.perf_counter()
+    caminho, temporario = _abrir_snapshot(Path(arquivo))
+    try:
+        origem = sqlite3.connect(str(caminho))
+        destino = sqlite3.connect(str(database.caminho_db()))
+        try:
+            origem.backup(destino, pages=paginas_por_passo)
+        finally:
+            destino.close()
+            origem.close()
+    finally:
+        if temporario:
+            caminho.unlink()
+    # Snapshots anteriores às últimas migrações (ex.: dinheiro em REAL)
+    # são atualizados para o esquema atual
+    database._inicializados.discard(str(database.caminho_db()))
+    database.init_db()
+    return {"linhas": verificacao["linhas"], "segundos": round(time.perf_counter() - inicio, 3)}
+
+
+def agendar_backups(destino: str | Path, intervalo: float, manter: int,
+                    comprimir: bool = False, parar: threading.Event | None = None):
+    """Cria um snapshot a cada `intervalo` segundos, mantendo os `manter` últimos."""
+    parar = parar or threading.Event()
+    while not parar.is_set():
+        r = criar_backup(destino, comprimir)
+        removidos = aplicar_retencao(destino, manter)
+        print(f"{r['arquivo']}: {r['bytes']:,} bytes em {r['segundos']}s "
+              f"({r['passos']} passos), {len(removidos)} antigos removidos", flush=True)
+        parar.wait(intervalo)
+
+
+def medir_impacto(destino: str | Path, duracao_base: float = 2.0) -> dict:
+    """Mede a latência de salvar_lancamento sem e durante um backup.
+
+    Um thread grava lançamentos continuamente em um cliente temporário;
+    retorna p50/p95/máx (ms) de cada fase e a duração do backup.
+    """
+    cliente_id = database.criar_cliente(f"_medicao_backup_{time.time_ns()}", 0.0)
+    latencias: list[tuple[float, float]] = []
+    parar = threading.Event()
+
+    def escritor():
+        dia = date(1900, 1, 1)
+        while not parar.is_set():
+            dia += timedelta(days=1)
+            inicio = time.perf_counter()
+            database.salvar_lancamento(cliente_id, dia.isoformat(), 1.0)
+            latencias.append((time.perf_counter(), (time.perf_counter() - inicio) * 1000))
+            time.sleep(0.002)
+
+    t = threading.Thread(target=escritor)
+    t.start()
+    r = None
+    try:
+        time.sleep(duracao_base)
+        ini_backup = time.perf_counter()
+        r = criar_backup(destino)
+        fim_backup = time.perf_counter()
+    finally:
+        parar.set()
+        t.join()
+        # salvar_lancamento também grava projeções (e o job de anomalias,
+        # alertas) que referenciam o cliente; metricas_produto sai em cascata
+        with database._conn() as conn:
+            for tabela in ("projecoes", "alertas", "lancamentos"):
+                conn.execute(f"DELETE FROM {tabela} WHERE cliente_id = ?", (cliente_id,))
+            conn.execute("DELETE FROM clientes WHERE id = ?", (cliente_id,))
+        if r is not None:
+            Path(r["arquivo"]).unlink(missing_ok=True)
+
+    def _stats(valores):
+        if not valores:
+            return None
+        valores = sorted(valores)
+        return {
+            "n": len(valores),
+            "p50": round(statistics.median(valores), 2),
+            "p95": round(valores[min(len(valores) - 1, int(len(valores) * 0.95))], 2),
+            "max": round(valores[-1], 2),
+        }
+
+    return {
+        "backup_segundos": r["segundos"],
+        "reinicios": r["reinicios"],
+        "passo_unico": r["passo_unico"],
+        "sem_backup_ms": _stats([ms for ts, ms in latencias if ts < ini_backup]),
+        "durante_backup_ms": _stats([ms for ts, ms in latencias if ini_backup <= ts <= fim_backup]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="arquivo SQLite (padrão: data/traffic.db)")
+    parser.add_argument("--workspace", help="workspace (agência); padrão: banco principal")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("criar")
+    p.add_argument("--destino", default="backups")
+    p.add_argument("--gzip", action="store_true")
+
+    p = sub.add_parser("agendar")
+    p.add_argument("--destino", default="backups")
+    p.add_argument("--intervalo", type=float, default=3600, help="segundos entre snapshots")
+    p.add_argument("--manter", type=int, default=24)
+    p.add_argument("--gzip", action="store_true")
+
+    p = sub.add_parser("verificar")
+    p.add_argument("arquivo")
+
+    p = sub.add_parser("restaurar")
+    p.add_argument("arquivo")
+
+    p = sub.add_parser("medir")
+    p.add_argument("--destino", default="backups")
+
+    args = parser.parse_args()
+    if args.db:
+        database.DB_PATH = Path(args.db)
+    if args.workspace:
+        database.usar_workspace(args.workspace)
+
+    if args.comando == "criar":
+        r = criar_backup(args.destino, args.gzip)
+        print(f"{r['arquivo']}: {r['bytes']:,} bytes em {r['segundos']}s "
+              f"({r['passos']} passos, {r['reinicios']} reinícios)")
+    elif args.comando == "agendar":
+        agendar_backups(args.destino, args.intervalo, args.manter, args.gzip)
+    elif args.comando == "verificar":
+        r = verificar_backup(args.arquivo)
+        print(f"integridade: {r['integridade']}")
+        for tabela, n in r["linhas"].items():
+            print(f"  {tabela}: {n:,} linhas")
+        raise SystemExit(0 if r["ok"] else 1)
+    elif args.comando == "restaurar":
+        r = restaurar_backup(args.arquivo)
+        print(f"Restaurado em {r['segundos']}s: {r['linhas']}")
+    elif args.comando == "medir":
+        database.init_db()
+        r = medir_impacto(args.destino)
+        print(f"backup: {r['backup_segundos']}s ({r['reinicios']} reinícios"
+              f"{', concluído em passo único' if r['passo_unico'] else ''})")
+        print(f"escrita sem backup (ms):   {r['sem_backup_ms']}")
+        print(f"escrita durante backup (ms): {r['durante_backup_ms']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Compara os motores analíticos (SQLite x DuckDB): paridade e tempo.
+
+Uso: python -m ferramentas.benchmark_analitico --clientes 200 --dias 1095
+"""
+import argparse
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import database
+from ferramentas.gerar_dados import gerar_dados
+
+MOTORES = ("sqlite", "duckdb")
+
+
+def _normalizar(valor):
+    # A ordem da soma em ponto flutuante difere entre os motores;
+    # a comparação é feita em centavos, a precisão dos dados.
+    if isinstance(valor, float):
+        return round(valor, 2)
+    if isinstance(valor, dict):
+        return {k: _normalizar(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_normalizar(v) for v in valor]
+    return valor
+
+
+def _consultas(clientes: list[int], meses: list[tuple[int, int]], periodo: tuple[str, str]):
+    for cliente_id in clientes:
+        for ano, mes in meses:
+            yield "resumo_mensal", database.resumo_mensal, (cliente_id, ano, mes)
+            yield "resumo_mensal_por_produto", database.resumo_mensal_por_produto, (cliente_id, ano, mes)
+            yield "metricas_diarias_por_produto", database.metricas_diarias_por_produto, (cliente_id, ano, mes)
+    yield "resumo_por_cliente", database.resumo_por_cliente, periodo
+
+
+def verificar_paridade(clientes, meses, periodo) -> list[str]:
+    """Retorna a lista de divergências entre os motores (vazia = paridade)."""
+    divergencias = []
+    for nome, func, args in _consultas(clientes, meses, periodo):
+        resultados = [_normalizar(func(*args, motor=m)) for m in MOTORES]
+        if resultados[0] != resultados[1]:
+            divergencias.append(f"{nome}{args}")
+    return divergencias
+
+
+def medir(clientes, meses, periodo, repeticoes: int = 3) -> dict[str, dict[str, float]]:
+    """Tempo total (ms) por consulta e motor, melhor de `repeticoes`."""
+    tempos: dict[str, dict[str, float]] = {}
+    for motor in MOTORES:
+        # Aquece o snapshot do DuckDB para medir só as consultas
+        database.resumo_por_cliente(*periodo, motor=motor)
+        for _ in range(repeticoes):
+            parcial: dict[str, float] = {}
+            for nome, func, args in _consultas(clientes, meses, periodo):
+                inicio = time.perf_counter()
+                func(*args, motor=motor)
+                parcial[nome] = parcial.get(nome, 0.0) + (time.perf_counter() - inicio) * 1000
+            for nome, ms in parcial.items():
+                atual = tempos.setdefault(nome, {}).get(motor)
+                tempos[nome][motor] = ms if atual is None else min(atual, ms)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clientes", type=int, default=100)
+    parser.add_argument("--produtos", type=int, default=3)
+    parser.add_argument("--dias", type=int, default=730)
+    parser.add_argument("--amostra", type=int, default=5, help="clientes consultados por mês")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = Path(tmp) / "bench.db"
+        inicio = time.perf_counter()
+        tamanho = gerar_dados(database.DB_PATH, args.clientes, args.produtos, args.dias)
+        print(f"Base gerada em {time.perf_counter() - inicio:.1f}s: {tamanho}")
+
+        clientes = [c["id"] for c in database.listar_clientes()][: args.amostra]
+        hoje = date.today()
+        meses = [(hoje.year - (m > hoje.month - 1), (hoje.month - 1 - m) % 12 + 1) for m in range(12)]
+        periodo = (date(hoje.year - args.dias // 365, 1, 1).isoformat(), hoje.isoformat())
+
+        divergencias = verificar_paridade(clientes, meses, periodo)
+        if divergencias:
+            print(f"PARIDADE FALHOU em {len(divergencias)} consultas:")
+            for d in divergencias[:20]:
+                print(f"  {d}")
+        else:
+            print("Paridade OK: resultados idênticos nos dois motores.")
+
+        print(f"\n{'consulta':32} {'sqlite ms':>11} {'duckdb ms':>11} {'ganho':>7}")
+        for nome, t in medir(clientes, meses, periodo).items():
+            ganho = t["sqlite"] / t["duckdb"] if t["duckdb"] else float("inf")
+            print(f"{nome:32} {t['sqlite']:11.1f} {t['duckdb']:11.1f} {ganho:6.1f}x")
+        raise SystemExit(1 if divergencias else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Compara leituras grandes com dinheiro em REAL (esquema antigo) e em centavos.
+
+Uso: python -m ferramentas.benchmark_centavos --clientes 200 --dias 1095
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+import database
+from ferramentas.gerar_dados import gerar_dados
+
+# (nome, SQL no esquema antigo, SQL no esquema em centavos)
+CONSULTAS = [
+    (
+        "totais por cliente",
+        """SELECT cliente_id, SUM(investimento), SUM(faturamento)
+           FROM lancamentos GROUP BY cliente_id""",
+        """SELECT cliente_id, SUM(investimento_centavos) / 100.0, SUM(faturamento_centavos) / 100.0
+           FROM lancamentos GROUP BY cliente_id""",
+    ),
+    (
+        "totais por produto",
+        """SELECT mp.produto_id, SUM(mp.investimento), SUM(mp.faturamento)
+           FROM metricas_produto mp JOIN lancamentos l ON l.id = mp.lancamento_id
+           GROUP BY mp.produto_id""",
+        """SELECT mp.produto_id, SUM(mp.investimento_centavos) / 100.0, SUM(mp.faturamento_centavos) / 100.0
+           FROM metricas_produto mp JOIN lancamentos l ON l.id = mp.lancamento_id
+           GROUP BY mp.produto_id""",
+    ),
+    (
+        "linhas diárias (lista)",
+        "SELECT id, cliente_id, data, investimento, faturamento FROM lancamentos",
+        """SELECT id, cliente_id, data, investimento_centavos / 100.0, faturamento_centavos / 100.0
+           FROM lancamentos""",
+    ),
+]
+
+
+def _criar_copia_em_reais(origem: Path, destino: Path):
+    # Caminho inverso da migração de database.init_db
+    with sqlite3.connect(str(origem)) as src, sqlite3.connect(str(destino)) as dst:
+        src.backup(dst)
+    conn = sqlite3.connect(str(destino))
+    with conn:
+        for tabela in ("lancamentos", "metricas_produto"):
+            for coluna in ("investimento", "faturamento"):
+                conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} REAL NOT NULL DEFAULT 0.0")
+                conn.execute(f"UPDATE {tabela} SET {coluna} = {coluna}_centavos / 100.0")
+                conn.execute(f"ALTER TABLE {tabela} DROP COLUMN {coluna}_centavos")
+    conn.execute("VACUUM")
+    conn.close()
+
+
+def _melhor_ms(conn: sqlite3.Connection, sql: str, repeticoes: int) -> float:
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        conn.execute(sql).fetchall()
+        melhor = min(melhor, (time.perf_counter() - inicio) * 1000)
+    return melhor
+
+
+def _melhor_ms_df(caminho: Path, sql: str, repeticoes: int) -> float:
+    # Pelo mesmo caminho dos jobs de análise (database._consulta_analitica_df)
+    anterior = database.DB_PATH
+    database.DB_PATH = caminho
+    try:
+        melhor = float("inf")
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            database._consulta_analitica_df(sql, (), "sqlite").groupby("cliente_id").sum()
+            melhor = min(melhor, (time.perf_counter() - inicio) * 1000)
+        return melhor
+    finally:
+        database.DB_PATH = anterior
+
+
+def medir(reais: Path, centavos: Path, repeticoes: int = 5) -> dict[str, dict[str, float]]:
+    """Melhor tempo (ms) de cada consulta nos dois esquemas."""
+    c_reais, c_centavos = sqlite3.connect(str(reais)), sqlite3.connect(str(centavos))
+    try:
+        tempos = {
+            nome: {
+                "reais": _melhor_ms(c_reais, sql_reais, repeticoes),
+                "centavos": _melhor_ms(c_centavos, sql_centavos, repeticoes),
+            }
+            for nome, sql_reais, sql_centavos in CONSULTAS
+        }
+        tempos["DataFrame + groupby"] = {
+            "reais": _melhor_ms_df(
+                reais, "SELECT cliente_id, investimento, faturamento FROM lancamentos", repeticoes
+            ),
+            "centavos": _melhor_ms_df(
+                centavos,
+                "SELECT cliente_id, investimento_centavos, faturamento_centavos FROM lancamentos",
+                repeticoes,
+            ),
+        }
+        return tempos
+    finally:
+        c_reais.close()
+        c_centavos.close()
+
+
+def desvio_ponto_flutuante(reais: Path, centavos: Path) -> dict:
+    """Quanto a soma em REAL se afasta da soma exata em centavos, por cliente."""
+    with sqlite3.connect(str(reais)) as c_reais, sqlite3.connect(str(centavos)) as c_centavos:
+        flutuante = dict(c_reais.execute(
+            "SELECT cliente_id, SUM(investimento) FROM lancamentos GROUP BY cliente_id"
+        ).fetchall())
+        exato = dict(c_centavos.execute(
+            "SELECT cliente_id, SUM(investimento_centavos) FROM lancamentos GROUP BY cliente_id"
+        ).fetchall())
+    desvios = [abs(flutuante[c] * 100 - exato[c]) for c in exato]
+    return {
+        "clientes": len(desvios),
+        "com_desvio": sum(d > 0 for d in desvios),
+        "max_desvio_centavos": max(desvios, default=0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clientes", type=int, default=100)
+    parser.add_argument("--produtos", type=int, default=3)
+    parser.add_argument("--dias", type=int, default=730)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        centavos, reais = Path(tmp) / "centavos.db", Path(tmp) / "reais.db"
+        inicio = time.perf_counter()
+        tamanho = gerar_dados(centavos, args.clientes, args.produtos, args.dias)
+        _criar_copia_em_reais(centavos, reais)
+        print(f"Bases geradas em {time.perf_counter() - inicio:.1f}s: {tamanho}")
+
+        print(f"\n{'consulta':26} {'REAL ms':>10} {'centavos ms':>12} {'razão':>7}")
+        for nome, t in medir(reais, centavos, args.repeticoes).items():
+            print(f"{nome:26} {t['reais']:10.1f} {t['centavos']:12.1f} {t['centavos'] / t['reais']:6.2f}x")
+
+        d = desvio_ponto_flutuante(reais, centavos)
+        print(f"\nSoma em REAL x exata: {d['com_desvio']} de {d['clientes']} clientes com desvio "
+              f"(máx. {d['max_desvio_centavos']:.2e} centavos)")
+
+
+if __name__ == "__main__":
+    main()
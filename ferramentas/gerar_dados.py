@@ -0,0 +1,102 @@
+"""Gera uma base sintética para benchmarks e testes de carga.
+
+Uso: python -m ferramentas.gerar_dados data/bench.db --clientes 200 --dias 730
+"""
+import argparse
+import random
+import sqlite3
+from datetime import date, timedelta
+from pathlib import Path
+
+import database
+
+
+def gerar_dados(
+    caminho: str | Path,
+    n_clientes: int = 50,
+    n_produtos: int = 3,
+    n_dias: int = 365,
+    inicio: date | None = None,
+    seed: int = 42,
+) -> dict:
+    """Cria clientes, produtos e lançamentos diários em `caminho`.
+
+    Os totais de `lancamentos` batem com a soma de `metricas_produto`,
+    como se tudo tivesse passado por salvar_lancamento.
+    """
+    caminho = Path(caminho)
+    rng = random.Random(seed)
+    inicio = inicio or date.today() - timedelta(days=n_dias - 1)
+
+    anterior = database.DB_PATH
+    database.DB_PATH = caminho
+    try:
+        database.init_db()
+    finally:
+        database.DB_PATH = anterior
+
+    conn = sqlite3.connect(str(caminho))
+    with conn:
+        lanc_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM lancamentos").fetchone()[0]
+        for c in range(n_clientes):
+            verba = rng.choice([3000, 5000, 10000, 20000, 50000])
+            cliente_id = conn.execute(
+                "INSERT INTO clientes (nome, verba_mensal) VALUES (?, ?)",
+                (f"Cliente {c + 1:04d} ({seed})", float(verba)),
+            ).lastrowid
+            produtos = [
+                conn.execute(
+                    "INSERT INTO produtos (cliente_id, nome) VALUES (?, ?)",
+                    (cliente_id, f"Produto {p + 1}"),
+                ).lastrowid
+                for p in range(n_produtos)
+            ]
+            diario = verba / 30
+            lancamentos, metricas = [], []
+            for d in range(n_dias):
+                dia = (inicio + timedelta(days=d)).isoformat()
+                lanc_id += 1
+                tot = [0, 0, 0, 0]
+                for produto_id in produtos:
+                    # Valores em centavos, como no banco
+                    inv = round(rng.uniform(0.2, 1.4) * diario / n_produtos * 100)
+                    leads = rng.randint(0, max(1, int(inv / 800)))
+                    vendas = rng.randint(0, max(0, leads // 5))
+                    fat = round(vendas * rng.uniform(90, 600) * 100)
+                    metricas.append((lanc_id, produto_id, inv, leads, vendas, fat))
+                    tot[0] += inv; tot[1] += leads; tot[2] += vendas; tot[3] += fat
+                obs = rng.choice(["", "", "", "trocou criativo", "pausou campanha", "subiu orçamento"])
+                lancamentos.append((lanc_id, cliente_id, dia, *tot, obs))
+            conn.executemany(
+                """INSERT INTO lancamentos
+                   (id, cliente_id, data, investimento_centavos, leads, vendas, faturamento_centavos, observacao)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                lancamentos,
+            )
+            conn.executemany(
+                """INSERT INTO metricas_produto
+                   (lancamento_id, produto_id, investimento_centavos, leads, vendas, faturamento_centavos)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                metricas,
+            )
+    conn.close()
+    return {
+        "clientes": n_clientes,
+        "lancamentos": n_clientes * n_dias,
+        "metricas_produto": n_clientes * n_dias * n_produtos,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("caminho")
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--produtos", type=int, default=3)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(gerar_dados(args.caminho, args.clientes, args.produtos, args.dias, seed=args.seed))
+
+
+if __name__ == "__main__":
+    main()
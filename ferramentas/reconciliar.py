@@ -0,0 +1,37 @@
+"""Reconcilia os totais de lancamentos com a soma de metricas_produto.
+
+Uso: python -m ferramentas.reconciliar [--cliente ID] [--inicio AAAA-MM-DD] [--fim AAAA-MM-DD] [--verificar]
+"""
+import argparse
+from pathlib import Path
+
+import database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", help="arquivo SQLite (padrão: data/traffic.db)")
+    parser.add_argument("--workspace", help="workspace (agência); padrão: banco principal")
+    parser.add_argument("--cliente", type=int)
+    parser.add_argument("--inicio")
+    parser.add_argument("--fim")
+    parser.add_argument("--dias-por-lote", type=int, default=92)
+    parser.add_argument("--verificar", action="store_true", help="só conta, não corrige")
+    args = parser.parse_args()
+
+    if args.db:
+        database.DB_PATH = Path(args.db)
+    if args.workspace:
+        database.usar_workspace(args.workspace)
+    database.init_db()
+    r = database.reconciliar_totais(
+        args.cliente, args.inicio, args.fim, args.dias_por_lote, corrigir=not args.verificar
+    )
+    print(
+        f"{r['lotes']} lotes, {r['divergentes']} lançamentos divergentes, "
+        f"{r['corrigidos']} corrigidos em {r['segundos']:.3f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Gera os relatórios mensais de todos os clientes ativos em paralelo.
+
+Uso: python -m ferramentas.relatorios_mensais 2026 9 --destino relatorios/ --workers 8 [--png]
+"""
+import argparse
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+import database
+from graficos import (
+    fig_distribuicao_investimento, fig_investimento_diario, fig_roas_diario,
+    fig_barras_por_produto, fig_barras_por_dia,
+)
+
+_ESTILO = """
+body { background: #0E1117; color: #FAFAFA; font-family: sans-serif; margin: 2rem; }
+table { border-collapse: collapse; margin-bottom: 1.5rem; }
+th, td { padding: 6px 12px; border-bottom: 1px solid rgba(250,250,250,0.1); text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+.graficos { display: grid; grid-template-columns: 1fr 1fr; gap: 1rem; }
+"""
+
+
+def _iniciar_worker(caminho: str):
+    database.usar_somente_leitura(caminho)
+
+
+def _moeda(v) -> str:
+    return f"R$ {v:,.2f}" if v is not None else "—"
+
+
+def _tabela(cabecalho: list[str], linhas: list[list]) -> str:
+    th = "".join(f"<th>{html.escape(c)}</th>" for c in cabecalho)
+    trs = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(str(v))}</td>" for v in linha) + "</tr>"
+        for linha in linhas
+    )
+    return f"<table><tr>{th}</tr>{trs}</table>"
+
+
+def _figuras(cliente_id: int, ano: int, mes: int, resumo_produtos: list[dict]) -> list[tuple[str, object]]:
+    figuras = []
+    df_pie = pd.DataFrame(resumo_produtos)
+    if not df_pie.empty and df_pie["total_investimento"].sum() > 0:
+        figuras.append(("Distribuição de Investimento por Produto", fig_distribuicao_investimento(df_pie)))
+
+    lancamentos = database.listar_lancamentos_mes(cliente_id, ano, mes)
+    if not lancamentos:
+        return figuras
+    df = pd.DataFrame(lancamentos)
+    df["data"] = pd.to_datetime(df["data"])
+    figuras.append(("Investimento Diário", fig_investimento_diario(df)))
+    df_roas = df.dropna(subset=["roas"])
+    if not df_roas.empty:
+        figuras.append(("ROAS Diário", fig_roas_diario(df_roas)))
+
+    dados_prod = database.metricas_diarias_por_produto(cliente_id, ano, mes)
+    if dados_prod:
+        df_mp = pd.DataFrame(dados_prod)
+        df_mp["data"] = pd.to_datetime(df_mp["data"])
+        figuras.append(("Leads por Produto", fig_barras_por_produto(df_mp, "leads", "Leads")))
+        figuras.append(("Vendas por Produto", fig_barras_por_produto(df_mp, "vendas", "Vendas")))
+    else:
+        figuras.append(("Leads por Dia", fig_barras_por_dia(df, "leads", "Leads", "#8B5CF6")))
+        figuras.append(("Vendas por Dia", fig_barras_por_dia(df, "vendas", "Vendas", "#22C55E")))
+    return figuras
+
+
+def gerar_relatorio(cliente_id: int, ano: int, mes: int, destino: str, png: bool = False) -> dict:
+    """Gera o relatório HTML (e opcionalmente PNGs) de um cliente no mês."""
+    inicio = time.perf_counter()
+    cliente = database.obter_cliente(cliente_id)
+    resumo = database.resumo_mensal(cliente_id, ano, mes)
+    resumo_produtos = database.resumo_mensal_por_produto(cliente_id, ano, mes)
+
+    verba = cliente["verba_mensal"]
+    consumo = f"{resumo['total_investido'] / verba:.0%}" if verba > 0 else "—"
+    kpis = _tabela(
+        ["Indicador", "Valor"],
+        [
+            ["Investido", _moeda(resumo["total_investido"])],
+            ["Verba mensal", f"{_moeda(verba)} ({consumo} consumido)"],
+            ["Faturamento", _moeda(resumo["total_faturamento"])],
+            ["ROAS", f"{resumo['roas']:.2f}x" if resumo["roas"] else "—"],
+            ["Leads", resumo["total_leads"]],
+            ["Vendas", resumo["total_vendas"]],
+            ["CPL Médio", _moeda(resumo["cpl_medio"])],
+            ["Dias com lançamento", resumo["dias"]],
+        ],
+    )
+    produtos = _tabela(
+        ["Produto", "Investimento", "Leads", "Vendas", "Faturamento", "ROAS", "Conversão"],
+        [
+            [
+                rp["produto_nome"], _moeda(rp["total_investimento"]), rp["total_leads"],
+                rp["total_vendas"], _moeda(rp["total_faturamento"]),
+                f"{rp['roas']:.2f}x" if rp["roas"] else "—",
+                f"{rp['conversao']:.1f}%" if rp["conversao"] else "—",
+            ]
+            for rp in resumo_produtos
+        ],
+    ) if resumo_produtos else ""
+
+    pasta = Path(destino) / f"{ano:04d}-{mes:02d}"
+    pasta.mkdir(parents=True, exist_ok=True)
+    base = f"cliente_{cliente_id:05d}"
+
+    blocos = []
+    for i, (titulo, fig) in enumerate(_figuras(cliente_id, ano, mes, resumo_produtos)):
+        blocos.append(
+            f"<div><h3>{html.escape(titulo)}</h3>"
+            f"{fig.to_html(full_html=False, include_plotlyjs='cdn' if i == 0 else False)}</div>"
+        )
+        if png:
+            # Requer o pacote kaleido
+            fig.write_image(pasta / f"{base}_{i + 1}.png", width=900, height=450)
+
+    titulo = f"{cliente['nome']} — {mes:02d}/{ano}"
+    arquivo = pasta / f"{base}.html"
+    arquivo.write_text(
+        f"""<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8">
+<title>{html.escape(titulo)}</title><style>{_ESTILO}</style></head><body>
+<h1>{html.escape(titulo)}</h1>
+<h2>Resumo do Mês</h2>{kpis}
+{"<h2>Desempenho por Produto</h2>" + produtos if produtos else ""}
+<div class="graficos">{"".join(blocos)}</div>
+</body></html>""",
+        encoding="utf-8",
+    )
+    return {
+        "cliente_id": cliente_id,
+        "arquivo": str(arquivo),
+        "ms": (time.perf_counter() - inicio) * 1000,
+    }
+
+
+def gerar_relatorios(
+    ano: int,
+    mes: int,
+    destino: str | Path,
+    workers: int | None = None,
+    png: bool = False,
+) -> dict:
+    """Gera um relatório por cliente ativo usando um pool de processos.
+
+    Cada worker abre sua própria conexão somente leitura ao banco.
+    Retorna o resumo da execução: quantidade, falhas, tempo e vazão.
+    """
+    workers = workers or os.cpu_count() or 1
+    clientes = [c["id"] for c in database.listar_clientes()]
+    inicio = time.perf_counter()
+    gerados, falhas = [], []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_iniciar_worker,
+        initargs=(str(database.caminho_db()),),
+    ) as pool:
+        futuros = {
+            pool.submit(gerar_relatorio, cid, ano, mes, str(destino), png): cid
+            for cid in clientes
+        }
+        for futuro in as_completed(futuros):
+            try:
+                gerados.append(futuro.result())
+            except Exception as e:
+                falhas.append({"cliente_id": futuros[futuro], "erro": str(e)})
+    segundos = time.perf_counter() - inicio
+    tempos = sorted(r["ms"] for r in gerados)
+    return {
+        "workers": workers,
+        "relatorios": len(gerados),
+        "falhas": falhas,
+        "segundos": round(segundos, 2),
+        "relatorios_por_segundo": round(len(gerados) / segundos, 1) if segundos else None,
+        "ms_mediano_por_relatorio": round(tempos[len(tempos) // 2], 1) if tempos else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("ano", type=int)
+    parser.add_argument("mes", type=int)
+    parser.add_argument("--db", help="arquivo SQLite (padrão: data/traffic.db)")
+    parser.add_argument("--workspace", help="workspace (agência); padrão: banco principal")
+    parser.add_argument("--destino", default="relatorios")
+    parser.add_argument("--workers", type=int, help="padrão: número de CPUs")
+    parser.add_argument("--png", action="store_true", help="exporta também os gráficos em PNG (requer kaleido)")
+    args = parser.parse_args()
+
+    if args.db:
+        database.DB_PATH = Path(args.db)
+    if args.workspace:
+        database.usar_workspace(args.workspace)
+    r = gerar_relatorios(args.ano, args.mes, args.destino, args.workers, args.png)
+    print(
+        f"{r['relatorios']} relatórios em {r['segundos']}s com {r['workers']} workers "
+        f"({r['relatorios_por_segundo']}/s, mediana {r['ms_mediano_por_relatorio']} ms)"
+    )
+    for f in r["falhas"]:
+        print(f"  falhou cliente {f['cliente_id']}: {f['erro']}")
+    raise SystemExit(1 if r["falhas"] else 0)
+
+
+if __name__ == "__main__":
+    main()
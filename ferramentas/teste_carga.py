@@ -0,0 +1,442 @@
+"""Teste de carga: sessões simuladas executando as páginas reais com AppTest.
+
+Uso: python -m ferramentas.teste_carga --sessoes 20 --acoes 30 [--escritas 0.1] [--base data/traffic.db]
+
+Cada sessão é uma thread com uma instância de AppTest por página (Clientes,
+Lançamentos, Dashboard), como um usuário com três abas: troca cliente e mês,
+pagina o histórico, busca e, numa fração das ações, envia formulários.
+Mede a latência de cada rerun, a espera pelo lock de escrita do SQLite e a
+memória do processo por sessão. Roda sempre sobre uma cópia da base.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+import database
+from ferramentas.gerar_dados import gerar_dados
+
+RAIZ = Path(__file__).resolve().parent.parent
+PAGINAS = {
+    "clientes": "pages/01_Clientes.py",
+    "lancamentos": "pages/02_Lancamentos.py",
+    "dashboard": "pages/03_Dashboard.py",
+}
+PESO_PAGINAS = {"clientes": 1, "lancamentos": 4, "dashboard": 4}
+TERMOS_BUSCA = ["criativo", "pausou", "orçamento", "campanha"]
+
+
+# ── Ações ─────────────────────────────────────────
+# Cada ação prepara os widgets e devolve o que dispara o rerun (o AppTest ou
+# o widget alterado), que é o que se mede. None pula a ação (widget ausente).
+
+def _selectbox(at, rotulo: str):
+    return next((s for s in at.selectbox if s.label == rotulo), None)
+
+
+def _trocar_mes(at, rng):
+    mes = _selectbox(at, "Mês")
+    return mes.select_index(rng.randrange(12)) if mes else None
+
+
+def _trocar_cliente(chave: str):
+    def acao(at, rng):
+        cliente = at.selectbox(key=chave)
+        return cliente.select_index(rng.randrange(len(cliente.options)))
+    return acao
+
+
+def _recarregar(at, rng):
+    return at
+
+
+def _proxima_pagina_historico(at, rng):
+    botao = at.button(key="hist_proxima")
+    if botao.disabled:
+        return at.button(key="hist_anterior").click() if not at.button(key="hist_anterior").disabled else at
+    return botao.click()
+
+
+def _buscar(at, rng):
+    return at.text_input(key="busca_termo").input(rng.choice(TERMOS_BUSCA))
+
+
+def _salvar_lancamento(at, rng):
+    # Formulário do dia de hoje para o cliente selecionado
+    investimentos = [n for n in at.number_input if str(n.key).startswith("i_")]
+    if not investimentos:
+        return None
+    for campo in investimentos:
+        campo.set_value(round(rng.uniform(10, 500), 2))
+    botao = next((b for b in at.button if b.label in ("Salvar", "Atualizar")), None)
+    return botao.click() if botao else None
+
+
+def _salvar_verba(at, rng):
+    verbas = [n for n in at.number_input if str(n.key).startswith("v_")]
+    if not verbas:
+        return None
+    campo = rng.choice(verbas)
+    cliente_id = str(campo.key)[2:]
+    campo.set_value(float(rng.choice([3000, 5000, 10000, 20000])))
+    return at.button(key=f"s_{cliente_id}").click()
+
+
+LEITURAS = {
+    "clientes": [("recarregar", _recarregar)],
+    "lancamentos": [
+        ("trocar_mes", _trocar_mes),
+        ("trocar_cliente", _trocar_cliente("lanc_cliente")),
+        ("historico_proxima", _proxima_pagina_historico),
+        ("buscar", _buscar),
+    ],
+    "dashboard": [
+        ("trocar_mes", _trocar_mes),
+        ("trocar_cliente", _trocar_cliente("dash_cliente")),
+    ],
+}
+ESCRITAS = {
+    "clientes": [("salvar_verba", _salvar_verba)],
+    "lancamentos": [("salvar_lancamento", _salvar_lancamento)],
+    "dashboard": [],
+}
+
+
+# ── Medições ──────────────────────────────────────
+
+class _Registro:
+    """Coleta thread-safe de latências (ms) por chave e de erros."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias: dict[tuple, list[float]] = defaultdict(list)
+        self.erros: dict[str, int] = defaultdict(int)
+
+    def latencia(self, chave: tuple, ms: float):
+        with self._lock:
+            self.latencias[chave].append(ms)
+
+    def erro(self, mensagem: str):
+        with self._lock:
+            self.erros[mensagem[:120]] += 1
+
+
+def _percentis(valores: list[float]) -> dict | None:
+    if not valores:
+        return None
+    valores = sorted(valores)
+
+    def p(q):
+        return round(valores[min(len(valores) - 1, int(len(valores) * q))], 1)
+
+    return {
+        "n": len(valores),
+        "p50": round(statistics.median(valores), 1),
+        "p90": p(0.90),
+        "p95": p(0.95),
+        "p99": p(0.99),
+        "max": round(valores[-1], 1),
+    }
+
+
+def _rss_mb() -> float:
+    # RSS atual (Linux); fora dele, o pico informado por getrusage
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _sonda_lock(caminho: Path, registro: _Registro, parar: threading.Event, intervalo: float):
+    # Quanto uma escrita esperaria agora pelo lock: BEGIN IMMEDIATE e ROLLBACK
+    conn = sqlite3.connect(str(caminho), timeout=60, isolation_level=None)
+    try:
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                registro.latencia(("sqlite", "espera_lock"), (time.perf_counter() - inicio) * 1000)
+                conn.execute("ROLLBACK")
+            except sqlite3.OperationalError as e:
+                registro.erro(f"sonda: {e}")
+            parar.wait(intervalo)
+    finally:
+        conn.close()
+
+
+def _instrumentar_escritas(registro: _Registro) -> dict:
+    # As páginas fazem "from database import ..." a cada rerun, então
+    # envolver os atributos do módulo mede as escritas vindas da UI.
+    originais = {}
+    for nome in ("salvar_lancamento", "atualizar_cliente"):
+        original = getattr(database, nome)
+
+        def medido(*args, _original=original, _nome=nome, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                registro.latencia(("sqlite", _nome), (time.perf_counter() - inicio) * 1000)
+
+        originais[nome] = original
+        setattr(database, nome, medido)
+    return originais
+
+
+# ── Sessões ───────────────────────────────────────
+
+@contextmanager
+def _runtime_compartilhado():
+    # A cada run o AppTest cria um Runtime global simulado e o apaga no fim;
+    # com sessões em paralelo, o fim de um run derrubaria o de outro. Aqui
+    # as sessões compartilham um Runtime único, como num servidor de verdade,
+    # e as atribuições de cada run caem numa subclasse sem efeito.
+    from unittest.mock import MagicMock
+    from streamlit.testing.v1 import app_test
+    from streamlit.testing.v1.util import patch_config_options
+
+    real = app_test.Runtime
+
+    class _RuntimeDoRun(real):
+        _instance = None
+
+    runtime = MagicMock(spec=real)
+    runtime.media_file_mgr = app_test.MediaFileManager(app_test.MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = app_test.DataframeSourceManager()
+    runtime.cache_storage_manager = app_test.MemoryCacheStorageManager()
+    componentes = app_test.BidiComponentManager()
+    componentes.discover_and_register_components(start_file_watching=False)
+    runtime.bidi_component_registry = componentes
+
+    app_test.Runtime = _RuntimeDoRun
+    real._instance = runtime
+    try:
+        # Mantém global.appTest ligado mesmo entre os patches de cada run
+        with patch_config_options({"global.appTest": True}):
+            yield
+    finally:
+        real._instance = None
+        app_test.Runtime = real
+
+
+def _rodar(registro: _Registro, pagina: str, acao: str, at, gatilho, timeout: float):
+    inicio = time.perf_counter()
+    try:
+        gatilho.run(timeout=timeout)
+    except Exception as e:
+        registro.erro(f"{pagina}/{acao}: {e!r}")
+        return
+    registro.latencia((pagina, acao), (time.perf_counter() - inicio) * 1000)
+    for excecao in at.exception:
+        registro.erro(f"{pagina}/{acao}: {excecao.message}")
+
+
+def _sessao(
+    n: int,
+    acoes: int,
+    escritas: float,
+    pausa: float,
+    atraso: float,
+    timeout: float,
+    registro: _Registro,
+    apps: list,
+):
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(n)
+    time.sleep(atraso)
+    paginas = {}
+    for pagina, arquivo in PAGINAS.items():
+        at = AppTest.from_file(str(RAIZ / arquivo), default_timeout=timeout)
+        _rodar(registro, pagina, "abrir", at, at, timeout)
+        paginas[pagina] = at
+    apps.append(paginas)  # mantidas vivas até o fim, para medir a memória
+
+    nomes, pesos = list(PESO_PAGINAS), list(PESO_PAGINAS.values())
+    for _ in range(acoes):
+        time.sleep(rng.uniform(0, 2 * pausa))
+        pagina = rng.choices(nomes, pesos)[0]
+        opcoes = ESCRITAS[pagina] if ESCRITAS[pagina] and rng.random() < escritas else LEITURAS[pagina]
+        acao, preparar = rng.choice(opcoes)
+        at = paginas[pagina]
+        try:
+            gatilho = preparar(at, rng)
+        except Exception as e:
+            registro.erro(f"{pagina}/{acao} (preparo): {e!r}")
+            continue
+        if gatilho is not None:
+            _rodar(registro, pagina, acao, at, gatilho, timeout)
+
+
+def executar_carga(
+    sessoes: int = 10,
+    acoes: int = 20,
+    escritas: float = 0.1,
+    pausa: float = 0.5,
+    rampa: float = 5.0,
+    timeout: float = 120.0,
+    intervalo_sonda: float = 0.05,
+) -> dict:
+    """Roda `sessoes` sessões simultâneas sobre o banco atual e devolve as medições.
+
+    Latências em ms por (página, ação); "sqlite" traz a espera pelo lock de
+    escrita (sonda) e a duração das escritas feitas pelas páginas.
+    """
+    with _runtime_compartilhado():
+        return _executar_carga(sessoes, acoes, escritas, pausa, rampa, timeout, intervalo_sonda)
+
+
+def _executar_carga(sessoes, acoes, escritas, pausa, rampa, timeout, intervalo_sonda) -> dict:
+    from streamlit import config as st_config, logger as st_logger
+    from streamlit.testing.v1 import AppTest
+
+    # Os avisos repetidos a cada rerun (ScriptRunContext, parâmetros
+    # obsoletos) poluiriam a saída; a config é lida antes para não
+    # restaurar o nível de log no primeiro run
+    st_config.get_config_options()
+    st_logger.set_log_level(logging.ERROR)
+
+    # Aquecimento: importações e primeiro carregamento fora da medição
+    for arquivo in PAGINAS.values():
+        AppTest.from_file(str(RAIZ / arquivo), default_timeout=timeout).run()
+    rss_base = _rss_mb()
+
+    registro = _Registro()
+    originais = _instrumentar_escritas(registro)
+    parar = threading.Event()
+    sonda = threading.Thread(
+        target=_sonda_lock, args=(database.caminho_db(), registro, parar, intervalo_sonda)
+    )
+    apps: list = []
+    threads = [
+        threading.Thread(
+            target=_sessao,
+            args=(n, acoes, escritas, pausa, rampa * n / max(sessoes, 1), timeout, registro, apps),
+            name=f"sessao-{n}",
+        )
+        for n in range(sessoes)
+    ]
+    inicio = time.perf_counter()
+    sonda.start()
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        parar.set()
+        sonda.join()
+        for nome, original in originais.items():
+            setattr(database, nome, original)
+    segundos = time.perf_counter() - inicio
+    rss_fim = _rss_mb()
+
+    reruns = [
+        ms for (pagina, _), valores in registro.latencias.items()
+        if pagina != "sqlite" for ms in valores
+    ]
+    escritas_ui = {acao for lista in ESCRITAS.values() for acao, _ in lista}
+    return {
+        "sessoes": sessoes,
+        "segundos": round(segundos, 1),
+        "reruns": len(reruns),
+        "reruns_por_segundo": round(len(reruns) / segundos, 1) if segundos else None,
+        "latencia_ms": _percentis(reruns),
+        "latencia_leitura_ms": _percentis([
+            ms for (pagina, acao), v in registro.latencias.items()
+            if pagina != "sqlite" and acao not in escritas_ui for ms in v
+        ]),
+        "latencia_escrita_ms": _percentis([
+            ms for (pagina, acao), v in registro.latencias.items()
+            if pagina != "sqlite" and acao in escritas_ui for ms in v
+        ]),
+        "por_acao_ms": {
+            f"{pagina}/{acao}": _percentis(v)
+            for (pagina, acao), v in sorted(registro.latencias.items())
+        },
+        "memoria_mb": {
+            "base": round(rss_base, 1),
+            "final": round(rss_fim, 1),
+            "por_sessao": round((rss_fim - rss_base) / sessoes, 2) if sessoes else None,
+        },
+        "erros": dict(registro.erros),
+    }
+
+
+def _preparar_base(args, tmp: Path) -> Path:
+    caminho = tmp / "carga.db"
+    if args.base:
+        # Trabalha numa cópia: o teste grava lançamentos e verbas
+        with sqlite3.connect(args.base) as origem, sqlite3.connect(str(caminho)) as destino:
+            origem.backup(destino)
+        database.DB_PATH = caminho
+        database.init_db()
+    else:
+        inicio = time.perf_counter()
+        tamanho = gerar_dados(caminho, args.clientes, args.produtos, args.dias)
+        print(f"Base gerada em {time.perf_counter() - inicio:.1f}s: {tamanho}")
+        database.DB_PATH = caminho
+    return caminho
+
+
+def _linha(nome: str, p: dict | None) -> str:
+    if not p:
+        return f"{nome:34} {'—':>6}"
+    return (f"{nome:34} {p['n']:6d} {p['p50']:8.1f} {p['p90']:8.1f} "
+            f"{p['p95']:8.1f} {p['p99']:8.1f} {p['max']:8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessoes", type=int, default=10, help="sessões simultâneas")
+    parser.add_argument("--acoes", type=int, default=20, help="ações por sessão, além de abrir as páginas")
+    parser.add_argument("--escritas", type=float, default=0.1, help="fração de ações que enviam formulários")
+    parser.add_argument("--pausa", type=float, default=0.5, help="tempo médio de reflexão entre ações (s)")
+    parser.add_argument("--rampa", type=float, default=5.0, help="segundos para iniciar todas as sessões")
+    parser.add_argument("--timeout", type=float, default=120.0, help="tempo máximo de um rerun (s)")
+    parser.add_argument("--base", help="parte de uma cópia desta base em vez de gerar uma")
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--produtos", type=int, default=3)
+    parser.add_argument("--dias", type=int, default=365)
+    parser.add_argument("--json", help="grava o resultado completo neste arquivo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _preparar_base(args, Path(tmp))
+        r = executar_carga(
+            args.sessoes, args.acoes, args.escritas, args.pausa, args.rampa, args.timeout
+        )
+
+    print(f"\n{r['sessoes']} sessões, {r['reruns']} reruns em {r['segundos']}s "
+          f"({r['reruns_por_segundo']}/s)")
+    print(f"\n{'ms':34} {'n':>6} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'máx':>8}")
+    print(_linha("todos os reruns", r["latencia_ms"]))
+    print(_linha("leituras", r["latencia_leitura_ms"]))
+    print(_linha("envios de formulário", r["latencia_escrita_ms"]))
+    print()
+    for nome, p in r["por_acao_ms"].items():
+        print(_linha(nome, p))
+    m = r["memoria_mb"]
+    print(f"\nMemória: {m['base']} MB -> {m['final']} MB ({m['por_sessao']} MB por sessão)")
+    if r["erros"]:
+        print(f"\nErros ({sum(r['erros'].values())}):")
+        for mensagem, n in sorted(r["erros"].items(), key=lambda x: -x[1]):
+            print(f"  {n:5d}  {mensagem}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(r, indent=2, ensure_ascii=False), encoding="utf-8")
+    raise SystemExit(1 if r["erros"] else 0)
+
+
+if __name__ == "__main__":
+    main()
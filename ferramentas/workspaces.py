@@ -0,0 +1,40 @@
+"""Administra os workspaces (um banco SQLite por agência).
+
+Uso:
+  python -m ferramentas.workspaces listar
+  python -m ferramentas.workspaces criar agencia-a agencia-b
+  python -m ferramentas.workspaces migrar [nome ...]
+"""
+import argparse
+
+import database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="comando", required=True)
+    sub.add_parser("listar")
+    p = sub.add_parser("criar")
+    p.add_argument("nomes", nargs="+")
+    p = sub.add_parser("migrar")
+    p.add_argument("nomes", nargs="*", help="padrão: todos")
+    args = parser.parse_args()
+
+    if args.comando == "listar":
+        for nome in database.listar_workspaces():
+            caminho = database.caminho_db(nome)
+            with database.em_workspace(nome), database._conn() as conn:
+                clientes = conn.execute("SELECT COUNT(*) FROM clientes").fetchone()[0]
+                lancamentos = conn.execute("SELECT COUNT(*) FROM lancamentos").fetchone()[0]
+            print(f"{nome:30} {caminho.stat().st_size / 1e6:9.1f} MB "
+                  f"{clientes:6} clientes {lancamentos:9} lançamentos")
+    elif args.comando == "criar":
+        for nome in args.nomes:
+            print(f"{nome}: {database.criar_workspace(nome)}")
+    elif args.comando == "migrar":
+        for nome, ms in database.migrar_workspaces(args.nomes or None).items():
+            print(f"{nome}: migrado em {ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import pandas as pd
+import plotly.express as px
+
+PLOTLY_LAYOUT = dict(
+    paper_bgcolor="rgba(0,0,0,0)",
+    plot_bgcolor="rgba(0,0,0,0)",
+    font_color="#FAFAFA",
+    margin=dict(l=0, r=0, t=40, b=0),
+    xaxis=dict(showgrid=False),
+    yaxis=dict(showgrid=True, gridcolor="rgba(250,250,250,0.06)"),
+)
+
+
+def fig_distribuicao_investimento(df_pie: pd.DataFrame):
+    fig = px.pie(
+        df_pie,
+        values="total_investimento",
+        names="produto_nome",
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Set2,
+    )
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font_color="#FAFAFA",
+        margin=dict(l=0, r=0, t=40, b=0),
+    )
+    fig.update_traces(textinfo="percent+label", textfont_size=13)
+    return fig
+
+
+def fig_investimento_diario(df: pd.DataFrame):
+    fig = px.area(
+        df, x="data", y="investimento",
+        labels={"data": "Data", "investimento": "R$"},
+        color_discrete_sequence=["#1B6EF3"],
+    )
+    fig.update_traces(
+        fill="tozeroy",
+        fillcolor="rgba(27,110,243,0.15)",
+        line=dict(width=2.5),
+    )
+    fig.update_layout(**PLOTLY_LAYOUT)
+    return fig
+
+
+def fig_roas_diario(df_roas: pd.DataFrame):
+    fig = px.line(
+        df_roas, x="data", y="roas",
+        labels={"data": "Data", "roas": "ROAS"},
+        color_discrete_sequence=["#F59E0B"],
+        markers=True,
+    )
+    fig.add_hline(
+        y=1.0, line_dash="dash", line_color="rgba(239,68,68,0.5)",
+        annotation_text="Break-even",
+        annotation_font_color="#EF4444",
+    )
+    fig.update_layout(**PLOTLY_LAYOUT)
+    return fig
+
+
+def fig_barras_por_produto(df_mp: pd.DataFrame, coluna: str, titulo: str):
+    fig = px.bar(
+        df_mp, x="data", y=coluna, color="produto_nome",
+        labels={"data": "Data", coluna: titulo, "produto_nome": "Produto"},
+        barmode="group",
+    )
+    fig.update_layout(**PLOTLY_LAYOUT)
+    return fig
+
+
+def fig_barras_por_dia(df: pd.DataFrame, coluna: str, titulo: str, cor: str):
+    fig = px.bar(
+        df, x="data", y=coluna,
+        labels={"data": "Data", coluna: titulo},
+        color_discrete_sequence=[cor],
+    )
+    fig.update_layout(**PLOTLY_LAYOUT)
+    return fig
@@ -1,5 +1,6 @@
 import streamlit as st
 from database import (
+    init_db,
     criar_cliente,
     listar_clientes,
     atualizar_cliente,
@@ -8,7 +9,10 @@ from database import (
     listar_produtos,
     desativar_produto,
 )
+from sessao import aplicar_workspace
 
+aplicar_workspace()
+init_db()
 st.title("Clientes")
 
 # ── Cadastro ──────────────────────────────────────
@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from datetime import date
+from datetime import date, timedelta
 from database import (
     init_db,
     listar_clientes,
@@ -8,11 +8,17 @@ from database import (
     listar_produtos,
     salvar_lancamento,
     listar_lancamentos_mes,
+    listar_lancamentos_periodo,
+    buscar_lancamentos,
     obter_lancamento,
     obter_metricas_produto,
     excluir_lancamento,
 )
+from desempenho import cronometrar, exibir_tempos
+from prefetch import carregar, pre_carregar, meses_vizinhos, exibir_estatisticas
+from sessao import aplicar_workspace
 
+aplicar_workspace()
 init_db()
 st.title("Lançamentos")
 
@@ -40,106 +46,119 @@ mes = col_m.selectbox("Mês", range(1, 13), index=hoje.month - 1)
 ano = col_a.number_input("Ano", value=hoje.year, min_value=2020, max_value=2030)
 
 # ── Formulário ────────────────────────────────────
-st.subheader("Novo Lançamento")
-data_sel = st.date_input("Data", value=hoje)
-existente = obter_lancamento(cliente_id, data_sel.isoformat())
-
-produtos = listar_produtos(cliente_id)
-
-# Carregar métricas existentes por produto
-metricas_existentes = {}
-if existente:
-    for m in obter_metricas_produto(existente["id"]):
-        metricas_existentes[m["produto_id"]] = m
-
-with st.form("lancamento", clear_on_submit=False):
-    metricas_form = []
-    investimento_generico = 0.0
-
-    if produtos:
-        st.markdown("**Métricas por Produto**")
-        for p in produtos:
-            st.caption(f"📦 {p['nome']}")
-            existing = metricas_existentes.get(p["id"], {})
-            pc1, pc2, pc3, pc4 = st.columns(4)
-            ctx = f"{cliente_id}_{data_sel.isoformat()}"
-            inv = pc1.number_input(
-                "Investimento (R$)", min_value=0.0, step=10.0,
-                value=existing.get("investimento", 0.0),
-                key=f"i_{p['id']}_{ctx}",
-            )
-            leads = pc2.number_input(
-                "Leads", min_value=0, step=1,
-                value=existing.get("leads", 0),
-                key=f"l_{p['id']}_{ctx}",
-            )
-            vendas = pc3.number_input(
-                "Vendas", min_value=0, step=1,
-                value=existing.get("vendas", 0),
-                key=f"v_{p['id']}_{ctx}",
-            )
-            faturamento = pc4.number_input(
-                "Faturamento (R$)", min_value=0.0, step=10.0,
-                value=existing.get("faturamento", 0.0),
-                key=f"f_{p['id']}_{ctx}",
+# Cada seção é um fragmento: interagir com ela reexecuta só o próprio corpo,
+# com os dados recebidos por parâmetro.
+@st.fragment
+@cronometrar("formulario")
+def secao_formulario(cliente_id: int):
+    st.subheader("Novo Lançamento")
+    data_sel = st.date_input("Data", value=hoje)
+    existente = obter_lancamento(cliente_id, data_sel.isoformat())
+
+    produtos = listar_produtos(cliente_id)
+
+    # Carregar métricas existentes por produto
+    metricas_existentes = {}
+    if existente:
+        for m in obter_metricas_produto(existente["id"]):
+            metricas_existentes[m["produto_id"]] = m
+
+    with st.form("lancamento", clear_on_submit=False):
+        metricas_form = []
+        investimento_generico = 0.0
+
+        if produtos:
+            st.markdown("**Métricas por Produto**")
+            for p in produtos:
+                st.caption(f"📦 {p['nome']}")
+                existing = metricas_existentes.get(p["id"], {})
+                pc1, pc2, pc3, pc4 = st.columns(4)
+                ctx = f"{cliente_id}_{data_sel.isoformat()}"
+                inv = pc1.number_input(
+                    "Investimento (R$)", min_value=0.0, step=10.0,
+                    value=existing.get("investimento", 0.0),
+                    key=f"i_{p['id']}_{ctx}",
+                )
+                leads = pc2.number_input(
+                    "Leads", min_value=0, step=1,
+                    value=existing.get("leads", 0),
+                    key=f"l_{p['id']}_{ctx}",
+                )
+                vendas = pc3.number_input(
+                    "Vendas", min_value=0, step=1,
+                    value=existing.get("vendas", 0),
+                    key=f"v_{p['id']}_{ctx}",
+                )
+                faturamento = pc4.number_input(
+                    "Faturamento (R$)", min_value=0.0, step=10.0,
+                    value=existing.get("faturamento", 0.0),
+                    key=f"f_{p['id']}_{ctx}",
+                )
+                metricas_form.append({
+                    "produto_id": p["id"],
+                    "investimento": inv,
+                    "leads": leads,
+                    "vendas": vendas,
+                    "faturamento": faturamento,
+                })
+        else:
+            st.info("Nenhum produto cadastrado. Cadastre na página Clientes para separar investimento por produto.")
+            investimento_generico = st.number_input(
+                "Investimento total do dia (R$)",
+                min_value=0.0,
+                step=10.0,
+                value=existente["investimento"] if existente else 0.0,
             )
-            metricas_form.append({
-                "produto_id": p["id"],
-                "investimento": inv,
-                "leads": leads,
-                "vendas": vendas,
-                "faturamento": faturamento,
-            })
-    else:
-        st.info("Nenhum produto cadastrado. Cadastre na página Clientes para separar investimento por produto.")
-        investimento_generico = st.number_input(
-            "Investimento total do dia (R$)",
-            min_value=0.0,
-            step=10.0,
-            value=existente["investimento"] if existente else 0.0,
+
+        obs = st.text_input(
+            "Observação",
+            value=existente["observacao"] if existente else "",
         )
 
-    obs = st.text_input(
-        "Observação",
-        value=existente["observacao"] if existente else "",
-    )
+        label = "Atualizar" if existente else "Salvar"
+        if st.form_submit_button(label):
+            salvar_lancamento(
+                cliente_id, data_sel.isoformat(), investimento_generico, obs,
+                metricas_form if produtos else None,
+            )
+            st.success(f"Lançamento {'atualizado' if existente else 'salvo'}!")
+            # Rerun da página inteira: a tabela do mês precisa refletir o novo dado
+            st.rerun()
 
-    label = "Atualizar" if existente else "Salvar"
-    if st.form_submit_button(label):
-        salvar_lancamento(
-            cliente_id, data_sel.isoformat(), investimento_generico, obs,
-            metricas_form if produtos else None,
-        )
-        st.success(f"Lançamento {'atualizado' if existente else 'salvo'}!")
-        st.rerun()
 
 # ── Tabela do mês ─────────────────────────────────
-st.subheader(f"Lançamentos — {mes:02d}/{ano}")
-lancamentos = listar_lancamentos_mes(cliente_id, ano, mes)
+# Formatação via column_config (feita no cliente), sem callbacks por célula
+COLUNAS_TABELA = {
+    "data": st.column_config.TextColumn("Data"),
+    "cliente_nome": st.column_config.TextColumn("Cliente"),
+    "investimento": st.column_config.NumberColumn("Investimento", format="R$ %.2f"),
+    "leads": st.column_config.NumberColumn("Leads", format="%d"),
+    "vendas": st.column_config.NumberColumn("Vendas", format="%d"),
+    "faturamento": st.column_config.NumberColumn("Faturamento", format="R$ %.2f"),
+    "roas": st.column_config.NumberColumn("ROAS", format="%.2fx"),
+    "cpl": st.column_config.NumberColumn("CPL", format="R$ %.2f"),
+    "cpv": st.column_config.NumberColumn("CPV", format="R$ %.2f"),
+    "observacao": st.column_config.TextColumn("Observação"),
+}
 
-if not lancamentos:
-    st.info("Nenhum lançamento neste mês.")
-else:
-    df = pd.DataFrame(lancamentos)
-
-    df_display = df[["data", "investimento", "leads", "vendas", "faturamento", "roas", "cpl", "cpv"]].copy()
-    df_display.columns = ["Data", "Investimento", "Leads", "Vendas", "Faturamento", "ROAS", "CPL", "CPV"]
 
+@cronometrar("tabela")
+def secao_tabela(lancamentos: list[dict]):
+    df = pd.DataFrame(lancamentos)
     st.dataframe(
-        df_display.style.format({
-            "Investimento": "R$ {:,.2f}",
-            "Faturamento": "R$ {:,.2f}",
-            "ROAS": lambda v: f"{v:.2f}x" if pd.notna(v) else "—",
-            "CPL": lambda v: f"R$ {v:,.2f}" if pd.notna(v) else "—",
-            "CPV": lambda v: f"R$ {v:,.2f}" if pd.notna(v) else "—",
-            "Leads": "{:,.0f}",
-            "Vendas": "{:,.0f}",
-        }),
+        df,
+        column_order=["data", "investimento", "leads", "vendas", "faturamento", "roas", "cpl", "cpv"],
+        column_config=COLUNAS_TABELA,
         use_container_width=True,
         hide_index=True,
     )
 
-    # ── Exclusão via selectbox ────────────────────
+
+# ── Exclusão via selectbox ────────────────────────
+# Trocar a seleção reexecuta só este fragmento, reaproveitando a lista recebida
+@st.fragment
+@cronometrar("exclusao")
+def secao_exclusao(lancamentos: list[dict]):
     st.markdown("---")
     opcoes_excluir = {l["id"]: f"{l['data']} — R$ {l['investimento']:,.2f}" for l in lancamentos}
     lanc_sel = st.selectbox(
@@ -151,3 +170,134 @@ else:
         excluir_lancamento(lanc_sel)
         st.success("Lançamento excluído!")
         st.rerun()
+
+
+# ── Histórico (paginado) ──────────────────────────
+# Cada página guarda a chave (cliente_id, data) da sua última linha;
+# "Próxima" continua dali, "Anterior" volta para a chave anterior da pilha.
+@st.fragment
+@cronometrar("historico")
+def secao_historico(cliente_id: int):
+    st.subheader("Histórico")
+    hc1, hc2, hc3 = st.columns([2, 1, 1])
+    periodo = hc1.date_input(
+        "Período", value=(hoje - timedelta(days=365), hoje), key="hist_periodo",
+    )
+    por_pagina = hc2.selectbox("Linhas por página", [25, 50, 100, 250], index=1, key="hist_por_pagina")
+    todos = hc3.checkbox("Todos os clientes", key="hist_todos")
+    if len(periodo) != 2:
+        st.info("Selecione a data final do período.")
+        return
+
+    filtro = (None if todos else cliente_id, periodo[0].isoformat(), periodo[1].isoformat(), por_pagina)
+    if st.session_state.get("hist_filtro") != filtro:
+        st.session_state["hist_filtro"] = filtro
+        st.session_state["hist_chaves"] = [None]
+    chaves = st.session_state["hist_chaves"]
+
+    # Busca uma linha a mais para saber se existe próxima página
+    linhas = listar_lancamentos_periodo(
+        filtro[1], filtro[2], filtro[0], apos=chaves[-1], limite=por_pagina + 1,
+    )
+    tem_proxima = len(linhas) > por_pagina
+    linhas = linhas[:por_pagina]
+
+    if not linhas:
+        st.info("Nenhum lançamento no período.")
+    else:
+        colunas = ["data", "investimento", "leads", "vendas", "faturamento", "roas", "cpl", "cpv", "observacao"]
+        if todos:
+            colunas.insert(0, "cliente_nome")
+        st.dataframe(
+            pd.DataFrame(linhas),
+            column_order=colunas,
+            column_config=COLUNAS_TABELA,
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    # Callbacks ajustam a pilha antes do rerun do fragmento
+    nc1, nc2, nc3 = st.columns([1, 2, 1])
+    nc1.button(
+        "← Anterior", disabled=len(chaves) == 1, key="hist_anterior",
+        on_click=chaves.pop,
+    )
+    nc2.caption(f"Página {len(chaves)}")
+    nc3.button(
+        "Próxima →", disabled=not tem_proxima, key="hist_proxima",
+        on_click=chaves.append,
+        args=((linhas[-1]["cliente_id"], linhas[-1]["data"]) if linhas else None,),
+    )
+
+# ── Busca nas observações ─────────────────────────
+@st.fragment
+@cronometrar("busca")
+def secao_busca(cliente_id: int):
+    st.subheader("Buscar nas Observações")
+    bc1, bc2 = st.columns([3, 1])
+    termo = bc1.text_input(
+        "Buscar", placeholder="Ex: trocou criativo, pausou campanha...",
+        key="busca_termo", label_visibility="collapsed",
+    )
+    todos = bc2.checkbox("Todos os clientes", key="busca_todos")
+    if not termo.strip():
+        return
+
+    filtro = (termo, todos, cliente_id)
+    if st.session_state.get("busca_filtro") != filtro:
+        st.session_state["busca_filtro"] = filtro
+        st.session_state["busca_pagina"] = 0
+    pagina = st.session_state["busca_pagina"]
+    por_pagina = 20
+
+    resultados = buscar_lancamentos(
+        termo, None if todos else cliente_id, limite=por_pagina + 1, pagina=pagina,
+    )
+    tem_proxima = len(resultados) > por_pagina
+    resultados = resultados[:por_pagina]
+
+    if not resultados:
+        st.info("Nenhuma observação encontrada.")
+        return
+
+    colunas = ["data", "trecho", "investimento", "leads", "vendas", "faturamento", "roas", "cpl", "cpv"]
+    if todos:
+        colunas.insert(0, "cliente_nome")
+    st.dataframe(
+        pd.DataFrame(resultados),
+        column_order=colunas,
+        column_config={**COLUNAS_TABELA, "trecho": st.column_config.TextColumn("Observação")},
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    def _mudar_pagina(delta: int):
+        st.session_state["busca_pagina"] += delta
+
+    nc1, nc2, nc3 = st.columns([1, 2, 1])
+    nc1.button("← Anterior", disabled=pagina == 0, key="busca_anterior",
+               on_click=_mudar_pagina, args=(-1,))
+    nc2.caption(f"Página {pagina + 1}")
+    nc3.button("Próxima →", disabled=not tem_proxima, key="busca_proxima",
+               on_click=_mudar_pagina, args=(1,))
+
+
+secao_formulario(cliente_id)
+
+st.subheader(f"Lançamentos — {mes:02d}/{ano}")
+lancamentos = carregar(listar_lancamentos_mes, cliente_id, ano, mes)
+
+if not lancamentos:
+    st.info("Nenhum lançamento neste mês.")
+else:
+    secao_tabela(lancamentos)
+    secao_exclusao(lancamentos)
+
+secao_historico(cliente_id)
+secao_busca(cliente_id)
+
+# Meses vizinhos em segundo plano: navegar pelo seletor encontra a tabela pronta
+pre_carregar([(listar_lancamentos_mes, (cliente_id, a, m)) for a, m in meses_vizinhos(ano, mes)])
+
+exibir_tempos()
+exibir_estatisticas()
@@ -1,13 +1,21 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from datetime import date
 from database import (
     init_db, listar_clientes, obter_cliente,
     resumo_mensal, listar_lancamentos_mes,
-    resumo_mensal_por_produto, metricas_diarias_por_produto,
+    resumo_mensal_por_produto, metricas_diarias_por_produto, listar_alertas,
+    obter_projecao,
+)
+from desempenho import cronometrar, exibir_tempos
+from prefetch import carregar, pre_carregar, meses_vizinhos, exibir_estatisticas
+from sessao import aplicar_workspace
+from graficos import (
+    fig_distribuicao_investimento, fig_investimento_diario, fig_roas_diario,
+    fig_barras_por_produto, fig_barras_por_dia,
 )
 
+aplicar_workspace()
 init_db()
 st.title("Dashboard")
 
@@ -34,8 +42,9 @@ col_m, col_a = st.sidebar.columns(2)
 mes = col_m.selectbox("Mês", range(1, 13), index=hoje.month - 1)
 ano = col_a.number_input("Ano", value=hoje.year, min_value=2020, max_value=2030)
 
-resumo = resumo_mensal(cliente_id, ano, mes)
+resumo = carregar(resumo_mensal, cliente_id, ano, mes)
 verba = cliente["verba_mensal"]
+projecao = carregar(obter_projecao, cliente_id, ano, mes)
 
 # ── Mês anterior (para delta) ─────────────────────
 if mes == 1:
@@ -43,7 +52,7 @@ if mes == 1:
 else:
     mes_ant, ano_ant = mes - 1, ano
 
-resumo_ant = resumo_mensal(cliente_id, ano_ant, mes_ant)
+resumo_ant = carregar(resumo_mensal, cliente_id, ano_ant, mes_ant)
 
 
 def _delta(atual, anterior):
@@ -55,238 +64,266 @@ def _delta(atual, anterior):
 
 
 # ── Barra de verba (HTML/CSS) ─────────────────────
-st.subheader("Consumo da Verba")
-
-if verba > 0:
-    pct = resumo["total_investido"] / verba
-    pct_display = min(pct, 1.0)
-    pct_text = f"{pct:.0%}"
+# Seções com dependências explícitas via parâmetros. Verba e KPIs não têm
+# widgets, então não são fragmentos (nada as reexecutaria isoladas).
+@cronometrar("verba")
+def secao_verba(resumo: dict, verba: float, projecao: dict | None):
+    st.subheader("Consumo da Verba")
+
+    if verba > 0:
+        pct = resumo["total_investido"] / verba
+        pct_display = min(pct, 1.0)
+        pct_text = f"{pct:.0%}"
+
+        if pct > 0.8:
+            bar_color = "#EF4444"
+        elif pct > 0.6:
+            bar_color = "#F59E0B"
+        else:
+            bar_color = "#22C55E"
 
-    if pct > 0.8:
-        bar_color = "#EF4444"
-    elif pct > 0.6:
-        bar_color = "#F59E0B"
-    else:
-        bar_color = "#22C55E"
-
-    st.markdown(f"""
-    <div style="
-        background: rgba(250,250,250,0.08);
-        border-radius: 10px;
-        height: 36px;
-        position: relative;
-        overflow: hidden;
-        margin-bottom: 8px;
-    ">
+        st.markdown(f"""
         <div style="
-            background: linear-gradient(90deg, {bar_color}CC, {bar_color});
-            width: {pct_display * 100:.1f}%;
-            height: 100%;
+            background: rgba(250,250,250,0.08);
             border-radius: 10px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            min-width: 60px;
-            transition: width 0.5s ease;
+            height: 36px;
+            position: relative;
+            overflow: hidden;
+            margin-bottom: 8px;
         ">
-            <span style="
-                color: white;
-                font-weight: 700;
-                font-size: 0.85rem;
-                text-shadow: 0 1px 2px rgba(0,0,0,0.3);
-            ">{pct_text}</span>
+            <div style="
+                background: linear-gradient(90deg, {bar_color}CC, {bar_color});
+                width: {pct_display * 100:.1f}%;
+                height: 100%;
+                border-radius: 10px;
+                display: flex;
+                align-items: center;
+                justify-content: center;
+                min-width: 60px;
+                transition: width 0.5s ease;
+            ">
+                <span style="
+                    color: white;
+                    font-weight: 700;
+                    font-size: 0.85rem;
+                    text-shadow: 0 1px 2px rgba(0,0,0,0.3);
+                ">{pct_text}</span>
+            </div>
         </div>
-    </div>
-    <p style="margin: 0; font-size: 0.9rem; opacity: 0.8;">
-        <strong>R$ {resumo['total_investido']:,.2f}</strong> de
-        <strong>R$ {verba:,.2f}</strong>
-    </p>
-    """, unsafe_allow_html=True)
-
-    if pct > 1.0:
-        st.error("Verba ultrapassada!")
-    elif pct > 0.8:
-        st.warning("Verba quase esgotada.")
-else:
-    st.info("Verba mensal não definida para este cliente.")
+        <p style="margin: 0; font-size: 0.9rem; opacity: 0.8;">
+            <strong>R$ {resumo['total_investido']:,.2f}</strong> de
+            <strong>R$ {verba:,.2f}</strong>
+        </p>
+        """, unsafe_allow_html=True)
+
+        if pct > 1.0:
+            st.error("Verba ultrapassada!")
+        elif pct > 0.8:
+            st.warning("Verba quase esgotada.")
+
+        # ── Projeção para o fim do mês ────────────
+        if projecao and projecao["dias_com_dado"]:
+            pct_proj = projecao["projecao"] / verba
+            st.caption(
+                f"Projeção para o fim do mês: **R$ {projecao['projecao']:,.2f}** "
+                f"({pct_proj:.0%} da verba), pelo ritmo até {projecao['ultima_data']}"
+            )
+            if pct <= 1.0 and pct_proj > 1.0:
+                st.warning(f"No ritmo atual a verba será ultrapassada em R$ {projecao['projecao'] - verba:,.2f}.")
+    else:
+        st.info("Verba mensal não definida para este cliente.")
+
 
 # ── Métricas gerais (com delta vs mês anterior) ───
-st.subheader("Resumo do Mês")
+@cronometrar("kpis")
+def secao_kpis(resumo: dict, resumo_ant: dict):
+    st.subheader("Resumo do Mês")
+
+    # Conversão geral
+    conversao = round(resumo["total_vendas"] / resumo["total_leads"] * 100, 1) if resumo["total_leads"] else None
+    conversao_ant = round(resumo_ant["total_vendas"] / resumo_ant["total_leads"] * 100, 1) if resumo_ant["total_leads"] else None
+
+    c1, c2, c3, c4, c5, c6, c7 = st.columns(7)
+    c1.metric(
+        "Investido", f"R$ {resumo['total_investido']:,.2f}",
+        delta=_delta(resumo["total_investido"], resumo_ant["total_investido"]),
+        delta_color="inverse",
+    )
+    c2.metric(
+        "Faturamento", f"R$ {resumo['total_faturamento']:,.2f}",
+        delta=_delta(resumo["total_faturamento"], resumo_ant["total_faturamento"]),
+    )
+    c3.metric(
+        "ROAS", f"{resumo['roas']:.2f}x" if resumo["roas"] else "—",
+        delta=_delta(resumo["roas"], resumo_ant["roas"]) if resumo["roas"] and resumo_ant["roas"] else None,
+    )
+    c4.metric(
+        "Leads", resumo["total_leads"],
+        delta=_delta(resumo["total_leads"], resumo_ant["total_leads"]),
+    )
+    c5.metric(
+        "Vendas", resumo["total_vendas"],
+        delta=_delta(resumo["total_vendas"], resumo_ant["total_vendas"]),
+    )
+    cpl_str = f"R$ {resumo['cpl_medio']:,.2f}" if resumo["cpl_medio"] else "—"
+    c6.metric(
+        "CPL Médio", cpl_str,
+        delta=_delta(resumo["cpl_medio"], resumo_ant["cpl_medio"]) if resumo["cpl_medio"] and resumo_ant["cpl_medio"] else None,
+        delta_color="inverse",
+    )
+    c7.metric(
+        "Conversão", f"{conversao:.1f}%" if conversao else "—",
+        delta=_delta(conversao, conversao_ant) if conversao and conversao_ant else None,
+    )
+
+
+# ── Alertas de anomalia ───────────────────────────
+# Gerados em lote por ferramentas.anomalias; aqui é só leitura da tabela
+@st.fragment
+@cronometrar("alertas")
+def secao_alertas(cliente_id: int, ano: int, mes: int):
+    alertas = carregar(listar_alertas, cliente_id, ano, mes)
+    if not alertas:
+        return
+    st.subheader("Alertas")
+    for a in alertas[:5]:
+        if a["metrica"] == "investimento":
+            st.warning(
+                f"{a['data']} — {a['produto_nome']}: investimento de R$ {a['valor']:,.2f} "
+                f"(típico R$ {a['referencia']:,.2f})"
+            )
+        else:
+            st.error(
+                f"{a['data']} — {a['produto_nome']}: ROAS {a['valor']:.2f}x "
+                f"(típico {a['referencia']:.2f}x)"
+            )
+    if len(alertas) > 5:
+        with st.expander(f"Ver todos os {len(alertas)} alertas"):
+            st.dataframe(
+                pd.DataFrame(alertas),
+                column_order=["data", "produto_nome", "metrica", "valor", "referencia", "escore"],
+                column_config={
+                    "data": "Data", "produto_nome": "Produto", "metrica": "Métrica",
+                    "valor": st.column_config.NumberColumn("Valor", format="%.2f"),
+                    "referencia": st.column_config.NumberColumn("Típico", format="%.2f"),
+                    "escore": st.column_config.NumberColumn("Escore", format="%.1f"),
+                },
+                use_container_width=True,
+                hide_index=True,
+            )
 
-# Conversão geral
-conversao = round(resumo["total_vendas"] / resumo["total_leads"] * 100, 1) if resumo["total_leads"] else None
-conversao_ant = round(resumo_ant["total_vendas"] / resumo_ant["total_leads"] * 100, 1) if resumo_ant["total_leads"] else None
-
-c1, c2, c3, c4, c5, c6, c7 = st.columns(7)
-c1.metric(
-    "Investido", f"R$ {resumo['total_investido']:,.2f}",
-    delta=_delta(resumo["total_investido"], resumo_ant["total_investido"]),
-    delta_color="inverse",
-)
-c2.metric(
-    "Faturamento", f"R$ {resumo['total_faturamento']:,.2f}",
-    delta=_delta(resumo["total_faturamento"], resumo_ant["total_faturamento"]),
-)
-c3.metric(
-    "ROAS", f"{resumo['roas']:.2f}x" if resumo["roas"] else "—",
-    delta=_delta(resumo["roas"], resumo_ant["roas"]) if resumo["roas"] and resumo_ant["roas"] else None,
-)
-c4.metric(
-    "Leads", resumo["total_leads"],
-    delta=_delta(resumo["total_leads"], resumo_ant["total_leads"]),
-)
-c5.metric(
-    "Vendas", resumo["total_vendas"],
-    delta=_delta(resumo["total_vendas"], resumo_ant["total_vendas"]),
-)
-cpl_str = f"R$ {resumo['cpl_medio']:,.2f}" if resumo["cpl_medio"] else "—"
-c6.metric(
-    "CPL Médio", cpl_str,
-    delta=_delta(resumo["cpl_medio"], resumo_ant["cpl_medio"]) if resumo["cpl_medio"] and resumo_ant["cpl_medio"] else None,
-    delta_color="inverse",
-)
-c7.metric(
-    "Conversão", f"{conversao:.1f}%" if conversao else "—",
-    delta=_delta(conversao, conversao_ant) if conversao and conversao_ant else None,
-)
 
 # ── Breakdown por produto ─────────────────────────
-resumo_produtos = resumo_mensal_por_produto(cliente_id, ano, mes)
-
-if resumo_produtos:
-    st.subheader("Desempenho por Produto")
-
-    cols_prod = st.columns(len(resumo_produtos))
-    for i, rp in enumerate(resumo_produtos):
-        with cols_prod[i]:
-            st.markdown(f"**{rp['produto_nome']}**")
-            st.metric("Investimento", f"R$ {rp['total_investimento']:,.2f}")
-            st.metric("Leads", rp["total_leads"])
-            st.metric("Vendas", rp["total_vendas"])
-            st.metric("Faturamento", f"R$ {rp['total_faturamento']:,.2f}")
-            st.metric("ROAS", f"{rp['roas']:.2f}x" if rp["roas"] else "—")
-            st.metric("Conversão", f"{rp['conversao']:.1f}%" if rp["conversao"] else "—")
-
-    # ── Pizza: Distribuição de investimento ────────
-    df_pie = pd.DataFrame(resumo_produtos)
-    if df_pie["total_investimento"].sum() > 0:
-        st.subheader("Distribuição de Investimento por Produto")
-        fig_pie = px.pie(
-            df_pie,
-            values="total_investimento",
-            names="produto_nome",
-            hole=0.4,
-            color_discrete_sequence=px.colors.qualitative.Set2,
-        )
-        fig_pie.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font_color="#FAFAFA",
-            margin=dict(l=0, r=0, t=40, b=0),
-        )
-        fig_pie.update_traces(textinfo="percent+label", textfont_size=13)
-        st.plotly_chart(fig_pie, use_container_width=True)
+@st.fragment
+@cronometrar("produtos")
+def secao_produtos(cliente_id: int, ano: int, mes: int):
+    resumo_produtos = carregar(resumo_mensal_por_produto, cliente_id, ano, mes)
+
+    if resumo_produtos:
+        st.subheader("Desempenho por Produto")
+
+        cols_prod = st.columns(len(resumo_produtos))
+        for i, rp in enumerate(resumo_produtos):
+            with cols_prod[i]:
+                st.markdown(f"**{rp['produto_nome']}**")
+                st.metric("Investimento", f"R$ {rp['total_investimento']:,.2f}")
+                st.metric("Leads", rp["total_leads"])
+                st.metric("Vendas", rp["total_vendas"])
+                st.metric("Faturamento", f"R$ {rp['total_faturamento']:,.2f}")
+                st.metric("ROAS", f"{rp['roas']:.2f}x" if rp["roas"] else "—")
+                st.metric("Conversão", f"{rp['conversao']:.1f}%" if rp["conversao"] else "—")
+
+        # ── Pizza: Distribuição de investimento ────────
+        df_pie = pd.DataFrame(resumo_produtos)
+        if df_pie["total_investimento"].sum() > 0:
+            st.subheader("Distribuição de Investimento por Produto")
+            st.plotly_chart(fig_distribuicao_investimento(df_pie), use_container_width=True)
+
 
 # ── Gráficos Plotly ───────────────────────────────
-lancamentos = listar_lancamentos_mes(cliente_id, ano, mes)
-
-plotly_layout = dict(
-    paper_bgcolor="rgba(0,0,0,0)",
-    plot_bgcolor="rgba(0,0,0,0)",
-    font_color="#FAFAFA",
-    margin=dict(l=0, r=0, t=40, b=0),
-    xaxis=dict(showgrid=False),
-    yaxis=dict(showgrid=True, gridcolor="rgba(250,250,250,0.06)"),
-)
+@st.fragment
+@cronometrar("graficos")
+def secao_graficos(cliente_id: int, ano: int, mes: int):
+    lancamentos = carregar(listar_lancamentos_mes, cliente_id, ano, mes)
 
-if lancamentos:
-    df = pd.DataFrame(lancamentos)
-    df["data"] = pd.to_datetime(df["data"])
-
-    col_g1, col_g2 = st.columns(2)
-
-    with col_g1:
-        st.subheader("Investimento Diário")
-        fig_inv = px.area(
-            df, x="data", y="investimento",
-            labels={"data": "Data", "investimento": "R$"},
-            color_discrete_sequence=["#1B6EF3"],
-        )
-        fig_inv.update_traces(
-            fill="tozeroy",
-            fillcolor="rgba(27,110,243,0.15)",
-            line=dict(width=2.5),
-        )
-        fig_inv.update_layout(**plotly_layout)
-        st.plotly_chart(fig_inv, use_container_width=True)
-
-    with col_g2:
-        st.subheader("ROAS Diário")
-        df_roas = df.dropna(subset=["roas"])
-        if not df_roas.empty:
-            fig_roas = px.line(
-                df_roas, x="data", y="roas",
-                labels={"data": "Data", "roas": "ROAS"},
-                color_discrete_sequence=["#F59E0B"],
-                markers=True,
-            )
-            fig_roas.add_hline(
-                y=1.0, line_dash="dash", line_color="rgba(239,68,68,0.5)",
-                annotation_text="Break-even",
-                annotation_font_color="#EF4444",
-            )
-            fig_roas.update_layout(**plotly_layout)
-            st.plotly_chart(fig_roas, use_container_width=True)
-        else:
-            st.info("Sem dados de faturamento para calcular ROAS.")
+    if lancamentos:
+        df = pd.DataFrame(lancamentos)
+        df["data"] = pd.to_datetime(df["data"])
 
-    # ── Gráficos por produto ──────────────────────
-    dados_prod = metricas_diarias_por_produto(cliente_id, ano, mes)
+        col_g1, col_g2 = st.columns(2)
 
-    if dados_prod:
-        df_mp = pd.DataFrame(dados_prod)
-        df_mp["data"] = pd.to_datetime(df_mp["data"])
+        with col_g1:
+            st.subheader("Investimento Diário")
+            st.plotly_chart(fig_investimento_diario(df), use_container_width=True)
 
-        col_g3, col_g4 = st.columns(2)
+        with col_g2:
+            st.subheader("ROAS Diário")
+            df_roas = df.dropna(subset=["roas"])
+            if not df_roas.empty:
+                st.plotly_chart(fig_roas_diario(df_roas), use_container_width=True)
+            else:
+                st.info("Sem dados de faturamento para calcular ROAS.")
 
-        with col_g3:
-            st.subheader("Leads por Produto")
-            fig_leads = px.bar(
-                df_mp, x="data", y="leads", color="produto_nome",
-                labels={"data": "Data", "leads": "Leads", "produto_nome": "Produto"},
-                barmode="group",
-            )
-            fig_leads.update_layout(**plotly_layout)
-            st.plotly_chart(fig_leads, use_container_width=True)
-
-        with col_g4:
-            st.subheader("Vendas por Produto")
-            fig_vendas = px.bar(
-                df_mp, x="data", y="vendas", color="produto_nome",
-                labels={"data": "Data", "vendas": "Vendas", "produto_nome": "Produto"},
-                barmode="group",
-            )
-            fig_vendas.update_layout(**plotly_layout)
-            st.plotly_chart(fig_vendas, use_container_width=True)
+        # ── Gráficos por produto ──────────────────────
+        dados_prod = carregar(metricas_diarias_por_produto, cliente_id, ano, mes)
+
+        if dados_prod:
+            df_mp = pd.DataFrame(dados_prod)
+            df_mp["data"] = pd.to_datetime(df_mp["data"])
+
+            col_g3, col_g4 = st.columns(2)
+
+            with col_g3:
+                st.subheader("Leads por Produto")
+                st.plotly_chart(fig_barras_por_produto(df_mp, "leads", "Leads"), use_container_width=True)
+
+            with col_g4:
+                st.subheader("Vendas por Produto")
+                st.plotly_chart(fig_barras_por_produto(df_mp, "vendas", "Vendas"), use_container_width=True)
+        else:
+            col_g3, col_g4 = st.columns(2)
+            with col_g3:
+                st.subheader("Leads por Dia")
+                st.plotly_chart(fig_barras_por_dia(df, "leads", "Leads", "#8B5CF6"), use_container_width=True)
+            with col_g4:
+                st.subheader("Vendas por Dia")
+                st.plotly_chart(fig_barras_por_dia(df, "vendas", "Vendas", "#22C55E"), use_container_width=True)
     else:
-        col_g3, col_g4 = st.columns(2)
-        with col_g3:
-            st.subheader("Leads por Dia")
-            fig_leads = px.bar(
-                df, x="data", y="leads",
-                labels={"data": "Data", "leads": "Leads"},
-                color_discrete_sequence=["#8B5CF6"],
-            )
-            fig_leads.update_layout(**plotly_layout)
-            st.plotly_chart(fig_leads, use_container_width=True)
-        with col_g4:
-            st.subheader("Vendas por Dia")
-            fig_vendas = px.bar(
-                df, x="data", y="vendas",
-                labels={"data": "Data", "vendas": "Vendas"},
-                color_discrete_sequence=["#22C55E"],
-            )
-            fig_vendas.update_layout(**plotly_layout)
-            st.plotly_chart(fig_vendas, use_container_width=True)
-else:
-    st.info("Sem lançamentos para exibir gráficos.")
+        st.info("Sem lançamentos para exibir gráficos.")
+
+secao_verba(resumo, verba, projecao)
+secao_kpis(resumo, resumo_ant)
+secao_alertas(cliente_id, ano, mes)
+secao_produtos(cliente_id, ano, mes)
+secao_graficos(cliente_id, ano, mes)
+
+
+# ── Pré-carregamento ──────────────────────────────
+# Depois de renderizar, carrega em segundo plano os meses vizinhos deste
+# cliente e o mês atual dos clientes próximos no seletor. Só leituras: uma
+# escrita mudaria data_version e invalidaria o cache de todas as sessões.
+def _tarefas_mes(cliente_id: int, ano: int, mes: int) -> list[tuple]:
+    (ano_a, mes_a), _ = meses_vizinhos(ano, mes)
+    return [
+        (resumo_mensal, (cliente_id, ano, mes)),
+        (resumo_mensal, (cliente_id, ano_a, mes_a)),
+        (listar_alertas, (cliente_id, ano, mes)),
+        (resumo_mensal_por_produto, (cliente_id, ano, mes)),
+        (listar_lancamentos_mes, (cliente_id, ano, mes)),
+        (metricas_diarias_por_produto, (cliente_id, ano, mes)),
+    ]
+
+
+ids = list(opcoes)
+pos = ids.index(cliente_id)
+vizinhos = ids[max(pos - 3, 0):pos] + ids[pos + 1:pos + 4]
+meses = meses_vizinhos(ano, mes)
+tarefas = [(obter_projecao, (cliente_id, a, m)) for a, m in meses]
+tarefas += [(obter_projecao, (c, ano, mes)) for c in vizinhos]
+tarefas += [t for a, m in meses for t in _tarefas_mes(cliente_id, a, m)]
+tarefas += [(resumo_mensal, (c, ano, mes)) for c in vizinhos]
+tarefas += [(resumo_mensal, (c, ano_ant, mes_ant)) for c in vizinhos]
+pre_carregar(tarefas)
+
+exibir_tempos()
+exibir_estatisticas()
@@ -0,0 +1,69 @@
+import streamlit as st
+import pandas as pd
+from datetime import date
+from database import init_db, listar_projecoes, recalcular_projecoes
+from desempenho import cronometrar, exibir_tempos
+from sessao import aplicar_workspace
+
+aplicar_workspace()
+init_db()
+st.title("Carteira")
+st.caption("Projeção de gasto no fim do mês para todos os clientes ativos.")
+
+# ── Seletor de mês ────────────────────────────────
+hoje = date.today()
+col_m, col_a = st.sidebar.columns(2)
+mes = col_m.selectbox("Mês", range(1, 13), index=hoje.month - 1)
+ano = col_a.number_input("Ano", value=hoje.year, min_value=2020, max_value=2030)
+
+if st.sidebar.button("Recalcular projeções"):
+    n = recalcular_projecoes(ano, mes)
+    st.sidebar.success(f"{n} clientes recalculados.")
+
+
+# ── Tabela de projeções ───────────────────────────
+@cronometrar("carteira")
+def secao_carteira(ano: int, mes: int):
+    projecoes = listar_projecoes(ano, mes)
+    if not projecoes:
+        st.info("Nenhum cliente cadastrado.")
+        return
+
+    df = pd.DataFrame(projecoes)
+    df["pct_projetado"] = df["pct_projetado"] * 100
+    df["situacao"] = "No ritmo"
+    df.loc[df["pct_projetado"] > 90, "situacao"] = "Atenção"
+    df.loc[df["pct_projetado"] > 100, "situacao"] = "Vai estourar"
+    df.loc[df["verba_mensal"] <= 0, "situacao"] = "Sem verba"
+    df = df.sort_values("pct_projetado", ascending=False, na_position="last")
+
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Clientes", len(df))
+    c2.metric("Vão estourar a verba", int((df["situacao"] == "Vai estourar").sum()))
+    c3.metric("Gasto projetado", f"R$ {df['projecao'].sum():,.2f}")
+
+    st.dataframe(
+        df,
+        column_order=[
+            "cliente_nome", "situacao", "verba_mensal", "gasto", "projecao",
+            "pct_projetado", "ultima_data",
+        ],
+        column_config={
+            "cliente_nome": "Cliente",
+            "situacao": "Situação",
+            "verba_mensal": st.column_config.NumberColumn("Verba", format="R$ %.2f"),
+            "gasto": st.column_config.NumberColumn("Gasto", format="R$ %.2f"),
+            "projecao": st.column_config.NumberColumn("Projeção", format="R$ %.2f"),
+            "pct_projetado": st.column_config.ProgressColumn(
+                "% da verba (projetado)", format="%.0f%%", min_value=0, max_value=150,
+            ),
+            "ultima_data": "Último lançamento",
+        },
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+secao_carteira(ano, mes)
+
+exibir_tempos()
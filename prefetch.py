@@ -0,0 +1,168 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+import database
+
+logger = logging.getLogger(__name__)
+
+MAX_ITENS_POR_SESSAO = 256
+
+# Threads de fundo compartilhadas pelas sessões do processo
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+
+class CachePeriodos:
+    """Cache LRU limitado de consultas por período, com pré-carregamento.
+
+    Cada item guarda a versão do banco (database.versao_dados) em que foi
+    lido; qualquer commit posterior o invalida.
+    """
+
+    def __init__(self, max_itens: int = MAX_ITENS_POR_SESSAO):
+        self.max_itens = max_itens
+        self._itens: OrderedDict[tuple, tuple[int, object, bool]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.pre_carregados = 0
+        self.pre_carregados_usados = 0
+        self.descartados = 0
+        # No máximo um job pendente por sessão: (workspace, tarefas) do
+        # render mais recente, consumido pelo próximo job do executor
+        self._fila: tuple[str | None, list[tuple]] | None = None
+        self._job_agendado = False
+
+    def _guardar(self, chave: tuple, versao: int, valor, pre_carregado: bool):
+        with self._lock:
+            self._itens[chave] = (versao, valor, pre_carregado)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+            if pre_carregado:
+                self.pre_carregados += 1
+
+    def _valido(self, chave: tuple, versao: int):
+        item = self._itens.get(chave)
+        return item if item is not None and item[0] == versao else None
+
+    def obter(self, func, *args):
+        chave = (database.workspace_atual(), func.__name__, args)
+        versao = database.versao_dados()
+        with self._lock:
+            item = self._valido(chave, versao)
+            if item is not None:
+                self.acertos += 1
+                if item[2]:
+                    self.pre_carregados_usados += 1
+                    self._itens[chave] = (item[0], item[1], False)
+                self._itens.move_to_end(chave)
+                return item[1]
+            self.faltas += 1
+        valor = func(*args)
+        self._guardar(chave, versao, valor, pre_carregado=False)
+        return valor
+
+    def agendar(self, tarefas: list[tuple]):
+        """Pré-carrega [(func, args), ...] em segundo plano no workspace atual.
+
+        Tarefas já válidas no cache são descartadas; se um job desta sessão
+        ainda está na fila, as tarefas dele são substituídas por estas.
+        """
+        workspace = database.workspace_atual()
+        versao = database.versao_dados()
+        with self._lock:
+            tarefas = [
+                (func, args) for func, args in tarefas
+                if self._valido((workspace, func.__name__, args), versao) is None
+            ]
+            if self._fila is not None:
+                self.descartados += len(self._fila[1])
+            self._fila = (workspace, tarefas) if tarefas else None
+            if self._fila is None or self._job_agendado:
+                return
+            self._job_agendado = True
+        _executor.submit(self._executar)
+
+    def _executar(self):
+        with self._lock:
+            self._job_agendado = False
+            if self._fila is None:
+                return
+            workspace, tarefas = self._fila
+            self._fila = None
+        self._pre_carregar(workspace, tarefas)
+
+    def _pre_carregar(self, workspace: str | None, tarefas: list[tuple]):
+        # As tarefas devem ser só leituras; uma segunda passada relê o que
+        # ficou desatualizado por escritas de outras sessões durante a primeira.
+        # Um render mais novo da sessão (fila preenchida) interrompe o job.
+        with database.em_workspace(workspace):
+            for _ in range(2):
+                pendentes = 0
+                for i, (func, args) in enumerate(tarefas):
+                    if self._fila is not None:
+                        with self._lock:
+                            self.descartados += len(tarefas) - i
+                        return
+                    chave = (workspace, func.__name__, args)
+                    try:
+                        versao = database.versao_dados()
+                        with self._lock:
+                            if self._valido(chave, versao) is not None:
+                                continue
+                        pendentes += 1
+                        self._guardar(chave, versao, func(*args), pre_carregado=True)
+                    except Exception:
+                        logger.exception("falha no pré-carregamento de %s%s", func.__name__, args)
+                if not pendentes:
+                    break
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            total = self.acertos + self.faltas
+            return {
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "taxa_acerto": self.acertos / total if total else None,
+                "pre_carregados": self.pre_carregados,
+                "pre_carregados_usados": self.pre_carregados_usados,
+                "descartados": self.descartados,
+                "itens": len(self._itens),
+            }
+
+
+def cache_da_sessao() -> CachePeriodos:
+    if "_cache_periodos" not in st.session_state:
+        st.session_state["_cache_periodos"] = CachePeriodos()
+    return st.session_state["_cache_periodos"]
+
+
+def carregar(func, *args):
+    """Chama func(*args) passando pelo cache da sessão."""
+    return cache_da_sessao().obter(func, *args)
+
+
+def pre_carregar(tarefas: list[tuple]):
+    cache_da_sessao().agendar(tarefas)
+
+
+def meses_vizinhos(ano: int, mes: int) -> list[tuple[int, int]]:
+    anterior = (ano - 1, 12) if mes == 1 else (ano, mes - 1)
+    proximo = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+    return [anterior, proximo]
+
+
+def exibir_estatisticas():
+    """Mostra na sidebar a taxa de acerto do cache e do pré-carregamento."""
+    e = cache_da_sessao().estatisticas()
+    if e["taxa_acerto"] is None:
+        return
+    with st.sidebar.expander("Cache de períodos"):
+        st.caption(f"Acertos: {e['acertos']} de {e['acertos'] + e['faltas']} ({e['taxa_acerto']:.0%})")
+        st.caption(f"Pré-carregados: {e['pre_carregados']} ({e['pre_carregados_usados']} usados, "
+                   f"{e['descartados']} descartados)")
+        st.caption(f"Itens no cache: {e['itens']}")
@@ -0,0 +1,45 @@
+import os
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import database
+
+# Workspaces separam o armazenamento, não o acesso: o app não tem
+# autenticação e, por padrão, quem souber (ou adivinhar) o nome de um
+# workspace pode lê-lo e alterá-lo pela URL (?workspace=<nome>). Para isolar
+# agências, rode um servidor por agência com TRAFFIC_WORKSPACE=<nome>: o
+# processo fica fixo nesse workspace e recusa outro pedido pela URL.
+WORKSPACE_FIXO = os.environ.get("TRAFFIC_WORKSPACE") or None
+
+
+def _workspace_da_sessao() -> str | None:
+    # Fora de uma execução do Streamlit (threads de fundo) não há sessão
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.get("workspace")
+
+
+def aplicar_workspace():
+    """Seleciona o banco da sessão a partir de ?workspace=<nome> na URL.
+
+    Deve ser chamado no topo de cada página, antes de init_db(). O valor fica
+    em st.session_state, então reruns de fragmentos e a troca de página
+    (que limpa a URL) continuam no mesmo banco. Não controla acesso
+    (ver WORKSPACE_FIXO).
+    """
+    database.definir_resolvedor_workspace(_workspace_da_sessao)
+    if WORKSPACE_FIXO:
+        pedido = st.query_params.get("workspace")
+        if pedido and pedido != WORKSPACE_FIXO:
+            st.error(f"Workspace '{pedido}' não está disponível neste servidor.")
+            st.stop()
+        nome = WORKSPACE_FIXO
+    else:
+        nome = st.query_params.get("workspace") or st.session_state.get("workspace")
+    if nome and nome not in database.listar_workspaces():
+        st.error(f"Workspace '{nome}' não encontrado.")
+        st.stop()
+    st.session_state["workspace"] = nome
+    if nome:
+        st.query_params["workspace"] = nome
@@ -0,0 +1,95 @@
+"""Paridade dos motores analíticos: SQLite e DuckDB devem devolver o mesmo.
+
+Roda com: python -m pytest tests
+"""
+from datetime import date
+
+import pytest
+
+import database
+from ferramentas.gerar_dados import gerar_dados
+
+pytest.importorskip("duckdb")
+
+INICIO = date(2026, 1, 1)
+DIAS = 120
+# Meses com dados, um parcial (abril termina em 30/04 = dia 120) e um vazio
+MESES = [(2026, 1), (2026, 2), (2026, 4), (2026, 6)]
+
+
+def _normalizar(valor):
+    # A ordem da soma em ponto flutuante difere entre os motores;
+    # a comparação é feita em centavos, a precisão dos dados.
+    if isinstance(valor, float):
+        return round(valor, 2)
+    if isinstance(valor, dict):
+        return {k: _normalizar(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_normalizar(v) for v in valor]
+    return valor
+
+
+@pytest.fixture(scope="module")
+def clientes(tmp_path_factory):
+    anterior = database.DB_PATH
+    database.DB_PATH = tmp_path_factory.mktemp("motor") / "paridade.db"
+    try:
+        gerar_dados(database.DB_PATH, n_clientes=6, n_produtos=3, n_dias=DIAS, inicio=INICIO)
+        # Casos de borda: cliente sem lançamentos e dia com investimento zero
+        database.criar_cliente("Sem lançamentos", 1000.0)
+        zerado = database.criar_cliente("Investimento zero", 1000.0)
+        produto = database.criar_produto(zerado, "Orgânico")
+        database.salvar_lancamento(zerado, "2026-02-10", metricas_produtos=[
+            {"produto_id": produto, "investimento": 0.0, "leads": 3, "vendas": 1, "faturamento": 50.0},
+        ])
+        yield [c["id"] for c in database.listar_clientes()]
+    finally:
+        database.DB_PATH = anterior
+
+
+def _comparar(func, *args):
+    sqlite = _normalizar(func(*args, motor="sqlite"))
+    duckdb = _normalizar(func(*args, motor="duckdb"))
+    assert sqlite == duckdb, f"{func.__name__}{args}"
+
+
+@pytest.mark.parametrize("func", [
+    database.resumo_mensal,
+    database.resumo_mensal_por_produto,
+    database.metricas_diarias_por_produto,
+])
+@pytest.mark.parametrize("ano,mes", MESES)
+def test_consultas_mensais(clientes, func, ano, mes):
+    for cliente_id in clientes:
+        _comparar(func, cliente_id, ano, mes)
+
+
+@pytest.mark.parametrize("periodo", [
+    ("2026-01-01", "2026-04-30"),
+    ("2026-02-10", "2026-02-10"),
+    ("2026-06-01", "2026-06-30"),
+])
+def test_resumo_por_cliente(clientes, periodo):
+    _comparar(database.resumo_por_cliente, *periodo)
+
+
+def test_motor_le_escritas_recentes(clientes, monkeypatch):
+    # Sem intervalo mínimo, o snapshot do DuckDB é refeito quando o SQLite muda
+    monkeypatch.setattr(database, "DUCKDB_IDADE_MINIMA", 0.0)
+    cliente_id = clientes[0]
+    database.resumo_mensal(cliente_id, 2026, 3, motor="duckdb")
+    database.salvar_lancamento(cliente_id, "2026-03-05", 1234.56)
+    _comparar(database.resumo_mensal, cliente_id, 2026, 3)
+    snapshot = database._duckdb_snapshots[str(database.caminho_db())]
+    assert snapshot.versao == database.versao_dados()
+
+
+def test_snapshot_recente_responde_pelo_sqlite(clientes, monkeypatch):
+    # Dentro do intervalo mínimo não há recarga, mas o resultado segue atual
+    monkeypatch.setattr(database, "DUCKDB_IDADE_MINIMA", 3600.0)
+    cliente_id = clientes[1]
+    database.resumo_mensal(cliente_id, 2026, 3, motor="duckdb")
+    snapshot = database._duckdb_snapshots[str(database.caminho_db())]
+    database.salvar_lancamento(cliente_id, "2026-03-06", 4321.09)
+    _comparar(database.resumo_mensal, cliente_id, 2026, 3)
+    assert database._duckdb_snapshots[str(database.caminho_db())] is snapshot